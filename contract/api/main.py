@@ -1,14 +1,21 @@
 """
 FastAPI REST API for Legal Fly Pro
 """
-from fastapi import FastAPI, File, UploadFile, HTTPException, Depends, status
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi import FastAPI, File, UploadFile, HTTPException, Depends, Request, status
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict
+from contextlib import asynccontextmanager
 import os
+import time
+import asyncio
+import base64
 import hashlib
-from datetime import datetime
+import tempfile
+from datetime import datetime, date, timedelta
 import uvicorn
 
 # Import internal modules
@@ -18,17 +25,50 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from utils.advanced_classifier import AdvancedContractClassifier
 from utils.advanced_risk_analyzer import AdvancedRiskAnalyzer
 from utils.clause_extractor import ClauseExtractor
-from reader import read_pdf
-from reports.pdf_generator import ReportGenerator
-from database.connection import get_db, init_db
-from database.models import Contract, ContractAnalysis, User
-from sqlalchemy.orm import Session
+from utils.contract_diff import ContractDiffer
+from utils.deadline_extractor import DeadlineExtractor
+from utils.rule_engine import get_rule_engine
+from utils.timing import StageTimer, render_metrics, timed
+from reader import read_pdf_pages
+from reports.pdf_generator import render_contract_report
+from reports.report_cache import get_report_cache
+from reports.batch_report import BatchReportJobs, portfolio_item, portfolio_query
+from database.connection import get_db_session, init_db
+from database.async_connection import AsyncSessionLocal, dispose_async_engines, get_async_db
+from database.audit import get_audit_writer
+from database.models import (
+    Clause, Contract, ContractAnalysis, ContractDeadline, PortfolioDailyRisk, PortfolioRiskLevel,
+    PortfolioRiskType, RiskFinding, User
+)
+from database.findings import store_findings
+from database.exports import (
+    EXPORT_COLUMNS, EXPORT_FORMATS, aiter_batches, csv_chunk, export_columns, jsonl_chunk, write_parquet
+)
+from database.text_store import load_text, store_text
+from database.rollups import record_analysis
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    load_models()
+    audit_writer = get_audit_writer()
+    report_cache = get_report_cache()
+    yield
+    await run_in_threadpool(report_cache.close)
+    await run_in_threadpool(batch_reports.close)
+    await run_in_threadpool(audit_writer.close)  # flush queued audit events
+    await dispose_async_engines()
+
 
 # Initialize FastAPI app
 app = FastAPI(
     title="Legal Fly Pro API",
     description="AI-Powered Contract Analysis API",
-    version="2.0.0"
+    version="2.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -40,26 +80,144 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize AI models
-classifier = AdvancedContractClassifier()
-risk_analyzer = AdvancedRiskAnalyzer()
-clause_extractor = ClauseExtractor()
+# AI models, set by load_models() at startup
+classifier: AdvancedContractClassifier = None
+clause_extractor: ClauseExtractor = None
+risk_analyzer: AdvancedRiskAnalyzer = None
+contract_differ: ContractDiffer = None
+deadline_extractor: DeadlineExtractor = None
+batch_reports: BatchReportJobs = None
+
+
+def load_models():
+    """
+    Initialize the models, batch report jobs and database (once, at startup)
+
+    Kept out of import time so processes that only import this module, such as
+    batch report workers re-importing the main script, do not repeat it.
+    """
+    global classifier, clause_extractor, risk_analyzer, contract_differ, deadline_extractor, batch_reports
+    if classifier is not None:
+        return
+    classifier = AdvancedContractClassifier()
+    clause_extractor = ClauseExtractor()
+    risk_analyzer = AdvancedRiskAnalyzer(clause_extractor=clause_extractor)
+    contract_differ = ContractDiffer(clause_extractor, risk_analyzer.semantic_model)
+    deadline_extractor = DeadlineExtractor()
+    batch_reports = BatchReportJobs()
+
+    # Initialize database (synchronously, once, before the async engines are used)
+    init_db()
+
+
+def _analyze_text(file_path: str, reference_date: date = None) -> tuple:
+    """
+    Text extraction and the model pipeline (CPU-bound; run in the threadpool)
+
+    Args:
+        reference_date: Start of relative deadlines when the contract states no effective date
+    """
+    contract_text, page_index = read_pdf_pages(file_path)  # "extraction" / "ocr" stages
+    if not contract_text.strip():
+        return contract_text, page_index, None, None, None, None, None
+    with timed("classification"):
+        classification = classifier.classify(contract_text)
+    with timed("clauses"):
+        clauses = clause_extractor.extract_clauses(contract_text)
+    with timed("risk"):
+        risk_analysis = risk_analyzer.analyze(contract_text, clauses=clauses, page_index=page_index)
+        summary = risk_analyzer.generate_risk_summary(risk_analysis)
+    with timed("deadlines"):
+        timeline = deadline_extractor.extract(contract_text, reference_date)  # notice periods, renewal and payment deadlines
+    return contract_text, page_index, classification, clauses, risk_analysis, summary, timeline
+
+
+def _clause_risk_level(clause, findings: List[Dict]) -> Optional[str]:
+    """Most severe finding located inside the clause, or None"""
+    severity_order = {"Critical": 0, "High": 1, "Medium": 2, "Low": 3}
+    levels = [
+        finding["severity"] for finding in findings
+        if any(clause.start <= loc["start"] < clause.end for loc in finding["locations"])
+    ]
+    return min(levels, key=severity_order.get) if levels else None
+
+
+def _audit(request: Request, action: str, user_id: int = None, resource_type: str = "contract",
+           resource_id: int = None, **details):
+    """Queue an audit event (written in batches off the request path)"""
+    get_audit_writer().log(
+        action,
+        user_id=user_id,
+        resource_type=resource_type,
+        resource_id=resource_id,
+        details=details or None,
+        ip_address=request.client.host if request.client else None
+    )
+
+
+async def _contract_with_analysis(db: AsyncSession, contract_id: int) -> tuple:
+    """(contract, latest analysis or None) in one query via Contract.latest_analysis_id"""
+    row = (await db.execute(
+        select(Contract, ContractAnalysis)
+        .outerjoin(ContractAnalysis, ContractAnalysis.id == Contract.latest_analysis_id)
+        .where(Contract.id == contract_id)
+    )).first()
+    return tuple(row) if row else (None, None)
 
-# Initialize database
-init_db()
+
+async def _duplicate_upload(db: AsyncSession, file_hash: str, user_id: int,
+                            started: float) -> Optional["ContractUploadResponse"]:
+    """
+    Upload response from the stored analysis of an already uploaded file
+
+    Returns:
+        None when the file is new; raises 409 when it belongs to another
+        user or was never analyzed
+    """
+    row = (await db.execute(
+        select(Contract, ContractAnalysis)
+        .outerjoin(ContractAnalysis, ContractAnalysis.id == Contract.latest_analysis_id)
+        .where(Contract.file_hash == file_hash)
+    )).first()
+    if row is None:
+        return None
+    contract, analysis = row
+    if contract.user_id != user_id or analysis is None:
+        raise HTTPException(status_code=409, detail="This file has already been uploaded")
+
+    findings = analysis.risk_factors or []
+    return ContractUploadResponse(
+        contract_id=contract.id,
+        message="Contract already analyzed",
+        file_name=contract.file_name,
+        contract_type=contract.contract_type,
+        analysis=ContractAnalysisResponse(
+            contract_id=contract.id,
+            contract_type=contract.contract_type,
+            risk_score=analysis.risk_score,
+            risk_level=analysis.risk_level,
+            total_findings=len(findings),
+            findings=findings,
+            summary=analysis.summary,
+            analysis_timestamp=analysis.created_at.isoformat(),
+            processing_time=round(time.perf_counter() - started, 4)
+        )
+    )
 
 
 # Pydantic models for API
 class ContractAnalysisResponse(BaseModel):
     contract_id: int
     contract_type: str
-    confidence: float
+    confidence: Optional[float] = None  # not stored; None when an earlier analysis is returned
     risk_score: float
     risk_level: str
     total_findings: int
     findings: List[Dict]
     summary: Optional[str] = None
     analysis_timestamp: str
+    processing_time: Optional[float] = None  # seconds
+    stage_timings: Optional[Dict[str, float]] = None
 
 
 class ContractUploadResponse(BaseModel):
@@ -70,6 +228,11 @@ class ContractUploadResponse(BaseModel):
     analysis: ContractAnalysisResponse
 
 
+class BatchReportRequest(BaseModel):
+    contract_ids: Optional[List[int]] = None  # default: every analyzed contract of the user
+    title: str = "Portfolio Risk Report"
+
+
 class HealthCheck(BaseModel):
     status: str
     version: str
@@ -90,13 +253,14 @@ async def root():
 
 @app.post("/api/v1/contracts/analyze", response_model=ContractUploadResponse)
 async def analyze_contract(
+    request: Request,
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user_id: int = 1  # TODO: Get from auth token
 ):
     """
     Upload and analyze a contract
-    
+
     - **file**: PDF contract file
     - Returns: Complete contract analysis
     """
@@ -106,108 +270,184 @@ async def analyze_contract(
             status_code=400,
             detail="Only PDF files are supported"
         )
-    
-    try:
-        # Save uploaded file temporarily
-        upload_dir = "uploads"
-        os.makedirs(upload_dir, exist_ok=True)
-        
-        file_path = os.path.join(upload_dir, file.filename)
-        with open(file_path, "wb") as f:
-            content = await file.read()
-            f.write(content)
-        
-        # Calculate file hash
-        file_hash = hashlib.sha256(content).hexdigest()
-        
-        # Extract text
-        contract_text = read_pdf(file_path)
-        
-        if not contract_text.strip():
-            raise HTTPException(
-                status_code=400,
-                detail="Could not extract text from PDF"
-            )
-        
-        # Classify contract
-        classification = classifier.classify(contract_text)
-        
-        # Analyze risks
-        risk_analysis = risk_analyzer.analyze(contract_text)
-        
-        # Store in database
-        contract = Contract(
-            user_id=user_id,
-            title=file.filename,
-            contract_type=classification['contract_type'],
-            file_name=file.filename,
-            file_path=file_path,
-            file_hash=file_hash,
-            text_content=contract_text[:10000],  # Store first 10k chars
-            page_count=contract_text.count("[Page"),
-            word_count=len(contract_text.split()),
-            uploaded_at=datetime.utcnow()
-        )
-        db.add(contract)
-        db.commit()
-        db.refresh(contract)
-        
-        # Store analysis
-        analysis = ContractAnalysis(
-            contract_id=contract.id,
-            user_id=user_id,
-            risk_score=risk_analysis['risk_score'],
-            risk_level=risk_analysis['risk_level'],
-            risk_factors=risk_analysis['findings'],
-            summary=risk_analyzer.generate_risk_summary(risk_analysis),
-            model_version="2.0.0",
-            created_at=datetime.utcnow()
-        )
-        db.add(analysis)
-        db.commit()
-        
-        # Prepare response
-        response = ContractUploadResponse(
-            contract_id=contract.id,
-            message="Contract analyzed successfully",
-            file_name=file.filename,
-            contract_type=classification['contract_type'],
-            analysis=ContractAnalysisResponse(
+
+    started = time.perf_counter()  # wall clock: stage spans miss queueing and threadpool hand-offs
+    timer = StageTimer()
+    with timer:
+        try:
+            # Save uploaded file temporarily
+            upload_dir = "uploads"
+            os.makedirs(upload_dir, exist_ok=True)
+            
+            file_path = os.path.join(upload_dir, file.filename)
+            with timed("upload"):
+                content = await file.read()
+                # Calculate file hash
+                file_hash = hashlib.sha256(content).hexdigest()
+            
+            # contracts.file_hash is unique: an identical file gets its stored analysis back
+            duplicate = await _duplicate_upload(db, file_hash, user_id, started)
+            if duplicate is not None:
+                _audit(request, "analyze", user_id, resource_id=duplicate.contract_id,
+                       file_name=file.filename, duplicate=True)
+                return duplicate
+            
+            with timed("upload"):
+                with open(file_path, "wb") as f:
+                    f.write(content)
+            
+            # Extract text, classify, analyze risks and deadlines off the event loop;
+            # undated contracts run from the upload date
+            uploaded_at = datetime.utcnow()
+            contract_text, page_index, classification, clauses, risk_analysis, summary, timeline = \
+                await run_in_threadpool(_analyze_text, file_path, uploaded_at.date())
+            
+            if classification is None:
+                raise HTTPException(
+                    status_code=400,
+                    detail="Could not extract text from PDF"
+                )
+            
+            try:
+                with timed("db_write"):
+                    # Store in database
+                    contract = Contract(
+                        user_id=user_id,
+                        title=file.filename,
+                        contract_type=classification['contract_type'],
+                        file_name=file.filename,
+                        file_path=file_path,
+                        file_hash=file_hash,
+                        page_count=len(page_index),
+                        word_count=len(contract_text.split()),
+                        uploaded_at=uploaded_at
+                    )
+                    db.add(contract)
+                    await db.run_sync(store_text, file_hash, contract_text)  # full text, compressed, out of the contracts row
+                    await db.flush()
+                
+                    # Store analysis; duration is wall-clock time up to here, breakdown the stages so far
+                    analysis = ContractAnalysis(
+                        contract_id=contract.id,
+                        user_id=user_id,
+                        risk_score=risk_analysis['risk_score'],
+                        risk_level=risk_analysis['risk_level'],
+                        risk_factors=risk_analysis['findings'],
+                        summary=summary,
+                        analysis_duration=round(time.perf_counter() - started, 4),
+                        stage_timings=timer.breakdown(),
+                        model_version="2.0.0",
+                        created_at=datetime.utcnow()
+                    )
+                    db.add(analysis)
+                    await db.flush()  # assigns analysis.id for the findings rows
+                    await db.run_sync(store_findings, analysis)
+                    await db.run_sync(record_analysis, analysis, contract.contract_type)
+                    db.add_all([
+                        ContractDeadline(
+                            contract_id=contract.id,
+                            user_id=user_id,
+                            kind=d['kind'],
+                            anchor=d['anchor'],
+                            direction=d['direction'],
+                            duration_days=d['duration_days'],
+                            due_date=d['due_date'],
+                            description=d['description'],
+                            start_offset=d['start'],
+                            end_offset=d['end']
+                        )
+                        for d in timeline['deadlines']
+                    ])
+                    db.add_all([
+                        Clause(
+                            contract_id=contract.id,
+                            clause_type=", ".join(c.clause_types)[:100],
+                            title=c.title[:500],
+                            content=c.content,
+                            page_number=page_index.page_of(c.start),
+                            risk_level=_clause_risk_level(c, risk_analysis['findings']),
+                            importance_score=c.importance
+                        )
+                        for c in clauses
+                    ])
+                    await db.commit()
+            except IntegrityError:
+                # The same file was stored by a concurrent upload
+                await db.rollback()
+                duplicate = await _duplicate_upload(db, file_hash, user_id, started)
+                if duplicate is None:
+                    raise
+                return duplicate
+            _contract_counts.pop(user_id, None)
+            _audit(request, "analyze", user_id, resource_id=contract.id,
+                   file_name=file.filename, analysis_id=analysis.id, risk_level=analysis.risk_level)
+            
+            # Prepare response
+            response = ContractUploadResponse(
                 contract_id=contract.id,
+                message="Contract analyzed successfully",
+                file_name=file.filename,
                 contract_type=classification['contract_type'],
-                confidence=classification['confidence'],
-                risk_score=risk_analysis['risk_score'],
-                risk_level=risk_analysis['risk_level'],
-                total_findings=risk_analysis['total_findings'],
-                findings=risk_analysis['findings'],
-                summary=risk_analyzer.generate_risk_summary(risk_analysis),
-                analysis_timestamp=risk_analysis['analysis_timestamp']
+                analysis=ContractAnalysisResponse(
+                    contract_id=contract.id,
+                    contract_type=classification['contract_type'],
+                    confidence=classification['confidence'],
+                    risk_score=risk_analysis['risk_score'],
+                    risk_level=risk_analysis['risk_level'],
+                    total_findings=risk_analysis['total_findings'],
+                    findings=risk_analysis['findings'],
+                    summary=summary,
+                    analysis_timestamp=risk_analysis['analysis_timestamp'],
+                    processing_time=round(time.perf_counter() - started, 4),
+                    stage_timings=timer.breakdown()
+                )
             )
-        )
-        
-        return response
-        
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Error analyzing contract: {str(e)}"
-        )
+            
+            return response
+            
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Error analyzing contract: {str(e)}"
+            )
+
+
+@app.get("/api/v1/contracts/redline")
+async def redline_contracts(
+    request: Request,
+    original_id: int,
+    revised_id: int,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Clause-aligned redline of one contract against another (e.g. a template)"""
+    original = await db.get(Contract, original_id)
+    revised = await db.get(Contract, revised_id)
+
+    if not original or not revised:
+        raise HTTPException(status_code=404, detail="Contract not found")
+
+    original_text = await db.run_sync(load_text, original)
+    revised_text = await db.run_sync(load_text, revised)
+    redline = await run_in_threadpool(contract_differ.diff, original_text or "", revised_text or "")
+    _audit(request, "redline", original.user_id, resource_id=original.id, revised_id=revised.id)
+
+    return {
+        "original": {"id": original.id, "title": original.title},
+        "revised": {"id": revised.id, "title": revised.title},
+        "redline": redline
+    }
 
 
 @app.get("/api/v1/contracts/{contract_id}")
-async def get_contract(contract_id: int, db: Session = Depends(get_db)):
+async def get_contract(contract_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get contract details"""
-    contract = db.query(Contract).filter(Contract.id == contract_id).first()
-    
+    contract, analysis = await _contract_with_analysis(db, contract_id)
+
     if not contract:
         raise HTTPException(status_code=404, detail="Contract not found")
-    
-    # Get latest analysis
-    analysis = db.query(ContractAnalysis)\
-        .filter(ContractAnalysis.contract_id == contract_id)\
-        .order_by(ContractAnalysis.created_at.desc())\
-        .first()
-    
+
     return {
         "contract": {
             "id": contract.id,
@@ -225,54 +465,53 @@ async def get_contract(contract_id: int, db: Session = Depends(get_db)):
 
 @app.get("/api/v1/contracts/{contract_id}/report")
 async def generate_report(
+    request: Request,
     contract_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Generate PDF report for contract"""
-    contract = db.query(Contract).filter(Contract.id == contract_id).first()
-    
+    contract, analysis = await _contract_with_analysis(db, contract_id)
+
     if not contract:
         raise HTTPException(status_code=404, detail="Contract not found")
-    
-    analysis = db.query(ContractAnalysis)\
-        .filter(ContractAnalysis.contract_id == contract_id)\
-        .order_by(ContractAnalysis.created_at.desc())\
-        .first()
-    
+
     if not analysis:
         raise HTTPException(status_code=404, detail="No analysis found")
-    
-    # Generate report
-    report_dir = "generated_reports"
-    os.makedirs(report_dir, exist_ok=True)
-    
-    report_path = os.path.join(
-        report_dir,
-        f"contract_{contract_id}_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-    )
-    
-    generator = ReportGenerator(report_path)
-    generator.add_cover_page(contract.title, contract.contract_type)
-    generator.add_executive_summary(
+
+    # Rendered once per analysis (and template version), then served from the cache
+    report_path, report_bytes = await asyncio.wrap_future(get_report_cache().get(
+        contract.id,
+        analysis.id,
+        render_contract_report,
+        contract.title,
+        contract.contract_type,
         analysis.risk_score,
         analysis.risk_level,
-        len(analysis.risk_factors)
-    )
-    generator.add_risk_findings(analysis.risk_factors)
-    generator.add_footer_note()
-    generator.generate()
-    
+        analysis.risk_factors,
+        analysis_date=analysis.created_at
+    ))
+    _audit(request, "report", contract.user_id, resource_id=contract.id, analysis_id=analysis.id)
+
+    filename = f"contract_report_{contract_id}.pdf"
+    if report_bytes is not None:
+        # Just rendered: send the in-memory PDF rather than reading the file back
+        return Response(
+            report_bytes,
+            media_type="application/pdf",
+            headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+        )
     return FileResponse(
         report_path,
         media_type="application/pdf",
-        filename=f"contract_report_{contract_id}.pdf"
+        filename=filename
     )
 
 
 @app.post("/api/v1/contracts/compare")
 async def compare_contracts(
+    request: Request,
     contract_ids: List[int],
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Compare multiple contracts"""
     if len(contract_ids) < 2:
@@ -280,21 +519,25 @@ async def compare_contracts(
             status_code=400,
             detail="At least 2 contracts required for comparison"
         )
-    
-    contracts = db.query(Contract).filter(Contract.id.in_(contract_ids)).all()
-    
+
+    contracts = (await db.scalars(select(Contract).where(Contract.id.in_(contract_ids)))).all()
+
     if len(contracts) != len(contract_ids):
         raise HTTPException(
             status_code=404,
             detail="One or more contracts not found"
         )
-    
+
     # Compare first two contracts
-    comparison = risk_analyzer.compare_contracts(
-        contracts[0].text_content,
-        contracts[1].text_content
+    first_text = await db.run_sync(load_text, contracts[0])
+    second_text = await db.run_sync(load_text, contracts[1])
+    comparison = await run_in_threadpool(
+        risk_analyzer.compare_contracts,
+        first_text or "",
+        second_text or ""
     )
-    
+    _audit(request, "compare", contracts[0].user_id, resource_id=contracts[0].id, contract_ids=contract_ids)
+
     return {
         "comparison": comparison,
         "contracts": [
@@ -304,21 +547,396 @@ async def compare_contracts(
     }
 
 
+@app.get("/api/v1/contracts/{contract_id}/deadlines")
+async def get_contract_deadlines(contract_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Obligation and deadline timeline of a contract"""
+    deadlines = (await db.scalars(
+        select(ContractDeadline)
+        .where(ContractDeadline.contract_id == contract_id)
+        .order_by(ContractDeadline.start_offset)
+    )).all()
+
+    return {
+        "contract_id": contract_id,
+        "deadlines": [_deadline_to_dict(d) for d in deadlines]
+    }
+
+
+@app.get("/api/v1/deadlines/upcoming")
+async def upcoming_deadlines(
+    days: int = 30,
+    db: AsyncSession = Depends(get_async_db),
+    user_id: int = 1  # TODO: Get from auth token
+):
+    """All obligations due in the next `days` days across the user's contracts"""
+    today = date.today()
+    rows = (await db.execute(
+        select(ContractDeadline, Contract.title)
+        .join(Contract, Contract.id == ContractDeadline.contract_id)
+        .where(
+            ContractDeadline.user_id == user_id,
+            ContractDeadline.due_date >= today,
+            ContractDeadline.due_date <= today + timedelta(days=days)
+        )
+        .order_by(ContractDeadline.due_date)
+    )).all()
+
+    return {
+        "from": today.isoformat(),
+        "to": (today + timedelta(days=days)).isoformat(),
+        "deadlines": [
+            {**_deadline_to_dict(deadline), "contract_id": deadline.contract_id, "contract_title": title}
+            for deadline, title in rows
+        ]
+    }
+
+
+def _deadline_to_dict(deadline: ContractDeadline) -> Dict:
+    """Serialize a deadline row"""
+    return {
+        "kind": deadline.kind,
+        "anchor": deadline.anchor,
+        "direction": deadline.direction,
+        "duration_days": deadline.duration_days,
+        "due_date": deadline.due_date.isoformat() if deadline.due_date else None,
+        "description": deadline.description
+    }
+
+
+@app.get("/api/v1/findings")
+async def search_findings(
+    risk_type: str,
+    severity: Optional[str] = None,
+    limit: int = 100,
+    db: AsyncSession = Depends(get_async_db),
+    user_id: int = 1  # TODO: Get from auth token
+):
+    """Contracts with a given risk type (e.g. "Unlimited Liability"), via the findings index"""
+    query = select(RiskFinding, Contract.title)\
+        .join(Contract, Contract.id == RiskFinding.contract_id)\
+        .where(RiskFinding.user_id == user_id, RiskFinding.risk_type == risk_type)
+    if severity:
+        query = query.where(RiskFinding.severity == severity)
+    rows = (await db.execute(query.order_by(RiskFinding.contract_id.desc()).limit(min(limit, 1000)))).all()
+
+    return {
+        "risk_type": risk_type,
+        "findings": [
+            {
+                "contract_id": finding.contract_id,
+                "contract_title": title,
+                "analysis_id": finding.analysis_id,
+                "severity": finding.severity,
+                "occurrences": finding.occurrences,
+                "page": finding.page_number,
+                "start": finding.start_offset,
+                "end": finding.end_offset
+            }
+            for finding, title in rows
+        ]
+    }
+
+
+@app.get("/api/v1/portfolio/risk-distribution")
+async def portfolio_risk_distribution(
+    db: AsyncSession = Depends(get_async_db),
+    user_id: int = 1  # TODO: Get from auth token
+):
+    """Risk levels and average score per contract type (from rollups)"""
+    rows = (await db.scalars(
+        select(PortfolioRiskLevel).where(PortfolioRiskLevel.user_id == user_id)
+    )).all()
+
+    by_type = {}
+    for row in rows:
+        entry = by_type.setdefault(row.contract_type, {"levels": {}, "analyses": 0, "score_sum": 0.0})
+        entry["levels"][row.risk_level] = row.analysis_count
+        entry["analyses"] += row.analysis_count
+        entry["score_sum"] += row.score_sum
+
+    return {
+        "by_contract_type": {
+            contract_type: {
+                "levels": entry["levels"],
+                "analyses": entry["analyses"],
+                "average_score": round(entry["score_sum"] / entry["analyses"], 2) if entry["analyses"] else None
+            }
+            for contract_type, entry in by_type.items()
+        }
+    }
+
+
+@app.get("/api/v1/portfolio/top-risks")
+async def portfolio_top_risks(
+    limit: int = 10,
+    db: AsyncSession = Depends(get_async_db),
+    user_id: int = 1  # TODO: Get from auth token
+):
+    """Most frequently found risk types across the user's analyses"""
+    rows = (await db.scalars(
+        select(PortfolioRiskType)
+        .where(PortfolioRiskType.user_id == user_id)
+        .order_by(PortfolioRiskType.analysis_count.desc(), PortfolioRiskType.occurrence_count.desc())
+        .limit(min(limit, 100))
+    )).all()
+
+    return {
+        "risk_types": [
+            {
+                "risk_type": row.risk_type,
+                "severity": row.severity,
+                "analyses": row.analysis_count,
+                "occurrences": row.occurrence_count
+            }
+            for row in rows
+        ]
+    }
+
+
+@app.get("/api/v1/portfolio/trend")
+async def portfolio_trend(
+    days: int = 90,
+    db: AsyncSession = Depends(get_async_db),
+    user_id: int = 1  # TODO: Get from auth token
+):
+    """Daily analysis count, average risk score and high-risk share"""
+    since = date.today() - timedelta(days=days)
+    rows = (await db.scalars(
+        select(PortfolioDailyRisk)
+        .where(PortfolioDailyRisk.user_id == user_id, PortfolioDailyRisk.day >= since)
+        .order_by(PortfolioDailyRisk.day)
+    )).all()
+
+    return {
+        "from": since.isoformat(),
+        "trend": [
+            {
+                "day": row.day.isoformat(),
+                "analyses": row.analysis_count,
+                "average_score": round(row.score_sum / row.analysis_count, 2) if row.analysis_count else None,
+                "high_risk": row.high_risk_count
+            }
+            for row in rows
+        ]
+    }
+
+
+@app.post("/api/v1/portfolio/reports", status_code=202)
+async def create_portfolio_report(
+    request: Request,
+    batch: BatchReportRequest,
+    db: AsyncSession = Depends(get_async_db),
+    user_id: int = 1  # TODO: Get from auth token
+):
+    """Start a combined report over many contracts; poll the returned job for progress"""
+    rows = (await db.execute(portfolio_query(user_id, batch.contract_ids))).all()
+    if not rows:
+        raise HTTPException(status_code=404, detail="No analyzed contracts found")
+
+    job = batch_reports.submit([portfolio_item(row) for row in rows], batch.title, user_id)
+    _audit(request, "batch_report", user_id, resource_type="portfolio",
+           job_id=job["job_id"], contracts=job["total"])
+    return job
+
+
+def _batch_job(job_id: str, user_id: int) -> Dict:
+    job = batch_reports.status(job_id)
+    if not job or job["user_id"] != user_id:
+        raise HTTPException(status_code=404, detail="Report job not found")
+    return job
+
+
+@app.get("/api/v1/portfolio/reports/{job_id}")
+async def portfolio_report_status(
+    job_id: str,
+    user_id: int = 1  # TODO: Get from auth token
+):
+    """Status and progress (completed of total contracts) of a batch report job"""
+    return _batch_job(job_id, user_id)
+
+
+@app.get("/api/v1/portfolio/reports/{job_id}/download")
+async def download_portfolio_report(
+    job_id: str,
+    user_id: int = 1  # TODO: Get from auth token
+):
+    """The merged PDF of a finished batch report job"""
+    job = _batch_job(job_id, user_id)
+    pdf = batch_reports.result(job_id)
+    if job["status"] != "done" or pdf is None:
+        raise HTTPException(status_code=409, detail=f"Report is {job['status']}")
+
+    return Response(
+        pdf,
+        media_type="application/pdf",
+        headers={"Content-Disposition": f'attachment; filename="portfolio_report_{job_id[:8]}.pdf"'}
+    )
+
+
+EXPORT_MEDIA_TYPES = {
+    "jsonl": "application/x-ndjson",
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet"
+}
+
+
+async def _export_stream(dataset: str, fmt: str, user_id: int):
+    """Encoded export chunks, one per cursor batch (uses its own session for the response's lifetime)"""
+    columns = export_columns(dataset)
+    if fmt == "csv":
+        yield csv_chunk([], columns, header=True)
+    async with AsyncSessionLocal() as db:
+        async for batch in aiter_batches(db, dataset, user_id):
+            yield jsonl_chunk(batch) if fmt == "jsonl" else csv_chunk(batch, columns)
+
+
+def _export_parquet_file(dataset: str, user_id: int) -> str:
+    """Parquet needs its footer written last, so it goes to a temp file (deleted after sending)"""
+    fd, path = tempfile.mkstemp(suffix=".parquet")
+    os.close(fd)
+    db = get_db_session()
+    try:
+        write_parquet(db, dataset, path, user_id)
+    except Exception:
+        os.remove(path)
+        raise
+    finally:
+        db.close()
+    return path
+
+
+@app.get("/api/v1/exports/{dataset}")
+async def export_data(
+    request: Request,
+    dataset: str,
+    format: str = "jsonl",
+    user_id: int = 1  # TODO: Get from auth token
+):
+    """
+    Export contracts, analyses, findings or clauses as JSONL, CSV or Parquet
+
+    JSONL and CSV are streamed from a server-side cursor as they are read.
+    """
+    if dataset not in EXPORT_COLUMNS:
+        raise HTTPException(status_code=404, detail=f"Unknown dataset (expected one of {', '.join(EXPORT_COLUMNS)})")
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unknown format (expected one of {', '.join(EXPORT_FORMATS)})")
+
+    _audit(request, "export", user_id, resource_type=dataset, format=format)
+    filename = f"{dataset}.{format}"
+
+    if format == "parquet":
+        try:
+            path = await run_in_threadpool(_export_parquet_file, dataset, user_id)
+        except RuntimeError as e:  # pyarrow not installed
+            raise HTTPException(status_code=501, detail=str(e))
+        return FileResponse(
+            path,
+            media_type=EXPORT_MEDIA_TYPES[format],
+            filename=filename,
+            background=BackgroundTask(os.remove, path)
+        )
+
+    return StreamingResponse(
+        _export_stream(dataset, format, user_id),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus metrics: stage and analysis latency histograms, audit and report cache counters"""
+    audit = get_audit_writer().stats()
+    reports = get_report_cache().stats()
+    return PlainTextResponse(
+        render_metrics({
+            "legal_fly_audit_events_written_total": ("counter", "Audit events written", audit["written"]),
+            "legal_fly_audit_events_dropped_total": ("counter", "Audit events dropped (queue full)", audit["dropped"]),
+            "legal_fly_audit_queue_size": ("gauge", "Audit events waiting to be written", audit["queued"]),
+            "legal_fly_report_cache_hits_total": ("counter", "Report downloads served from cache", reports["hits"]),
+            "legal_fly_report_cache_misses_total": ("counter", "Reports rendered", reports["misses"]),
+            "legal_fly_report_cache_bytes": ("gauge", "Size of cached reports", reports["bytes"]),
+        }),
+        media_type="text/plain; version=0.0.4"
+    )
+
+
+@app.get("/api/v1/rules")
+async def get_rules():
+    """Loaded risk rulebook version and per-rule hit counters"""
+    return get_rule_engine().stats()
+
+
+@app.post("/api/v1/rules/reload")
+async def reload_rules(request: Request):
+    """Recompile the risk rulebook from disk and swap it in"""
+    engine = get_rule_engine()
+    if not engine.reload(force=True) and engine.last_error:
+        raise HTTPException(status_code=422, detail=f"Rulebook not reloaded: {engine.last_error}")
+    _audit(request, "rules_reload", resource_type="rulebook", version=engine.rulebook.version)
+
+    return {"version": engine.rulebook.version, "reloaded_at": datetime.utcnow().isoformat()}
+
+
+# Per-user contract totals for listings: (count, expiry); refreshed after uploads
+CONTRACT_COUNT_TTL = 60.0
+_contract_counts: Dict[int, tuple] = {}
+
+
+async def _contract_count(db: AsyncSession, user_id: int) -> int:
+    """Total contracts of a user, cached for CONTRACT_COUNT_TTL seconds"""
+    cached = _contract_counts.get(user_id)
+    if cached and cached[1] > time.monotonic():
+        return cached[0]
+    count = await db.scalar(select(func.count(Contract.id)).where(Contract.user_id == user_id))
+    _contract_counts[user_id] = (count, time.monotonic() + CONTRACT_COUNT_TTL)
+    return count
+
+
+def _encode_cursor(uploaded_at: datetime, contract_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{uploaded_at.isoformat()}|{contract_id}".encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> tuple:
+    try:
+        uploaded_at, contract_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(uploaded_at), int(contract_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
 @app.get("/api/v1/contracts")
 async def list_contracts(
-    skip: int = 0,
+    cursor: Optional[str] = None,
     limit: int = 10,
-    db: Session = Depends(get_db),
+    skip: int = 0,
+    db: AsyncSession = Depends(get_async_db),
     user_id: int = 1  # TODO: Get from auth token
 ):
-    """List all contracts for user"""
-    contracts = db.query(Contract)\
-        .filter(Contract.user_id == user_id)\
-        .order_by(Contract.uploaded_at.desc())\
-        .offset(skip)\
-        .limit(limit)\
-        .all()
-    
+    """
+    List contracts for user, newest first
+
+    Pass `next_cursor` from the previous page as `cursor` to continue; each
+    page is an index range scan however deep it is. `skip` (offset paging)
+    is kept for older clients.
+    """
+    limit = max(1, min(limit, 100))
+    query = select(Contract.id, Contract.title, Contract.contract_type, Contract.uploaded_at)\
+        .where(Contract.user_id == user_id)\
+        .order_by(Contract.uploaded_at.desc(), Contract.id.desc())
+
+    if cursor:
+        uploaded_at, contract_id = _decode_cursor(cursor)
+        query = query.where(or_(
+            Contract.uploaded_at < uploaded_at,
+            and_(Contract.uploaded_at == uploaded_at, Contract.id < contract_id)
+        ))
+    elif skip:
+        query = query.offset(skip)
+
+    contracts = (await db.execute(query.limit(limit))).all()
+
     return {
         "contracts": [
             {
@@ -329,7 +947,8 @@ async def list_contracts(
             }
             for c in contracts
         ],
-        "total": db.query(Contract).filter(Contract.user_id == user_id).count()
+        "next_cursor": _encode_cursor(contracts[-1].uploaded_at, contracts[-1].id) if len(contracts) == limit else None,
+        "total": await _contract_count(db, user_id)
     }
 
 
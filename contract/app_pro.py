@@ -20,6 +20,8 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from utils.advanced_classifier import AdvancedContractClassifier
 from utils.advanced_risk_analyzer import AdvancedRiskAnalyzer
 from utils.clause_extractor import ClauseExtractor
+from utils.contract_diff import ContractDiffer
+from utils.page_index import PageIndex
 from reports.pdf_generator import ReportGenerator
 from database.connection import get_db_session, init_db
 from database.models import Contract, ContractAnalysis
@@ -232,44 +234,51 @@ if 'contract_history' not in st.session_state:
 def load_models():
     """Load AI models (cached)"""
     classifier = AdvancedContractClassifier()
-    risk_analyzer = AdvancedRiskAnalyzer()
     clause_extractor = ClauseExtractor()
-    return classifier, risk_analyzer, clause_extractor
+    risk_analyzer = AdvancedRiskAnalyzer(clause_extractor=clause_extractor)
+    contract_differ = ContractDiffer(clause_extractor, risk_analyzer.semantic_model)
+    return classifier, risk_analyzer, clause_extractor, contract_differ
 
-classifier, risk_analyzer, clause_extractor = load_models()
+classifier, risk_analyzer, clause_extractor, contract_differ = load_models()
 
 # Helper functions
 def extract_text_from_pdf(uploaded_file):
-    """Extract text from PDF with OCR fallback"""
+    """Extract text from PDF with OCR fallback, plus the offset where each page starts"""
     text = ""
+    page_index = PageIndex()
     try:
         pdf_reader = PyPDF2.PdfReader(uploaded_file)
-        for page in pdf_reader.pages:
+        for page_number, page in enumerate(pdf_reader.pages, 1):
             page_text = page.extract_text()
             if page_text:
+                page_index.add_page(len(text), page_number)
                 text += page_text + "\n"
     except Exception as e:
         st.warning(f"PyPDF2 extraction failed: {e}")
     
     if not text.strip():
+        text, page_index = "", PageIndex()
         try:
             with pdfplumber.open(uploaded_file) as pdf:
-                for page in pdf.pages:
+                for page_number, page in enumerate(pdf.pages, 1):
                     page_text = page.extract_text()
                     if page_text:
+                        page_index.add_page(len(text), page_number)
                         text += page_text + "\n"
         except Exception as e:
             st.warning(f"pdfplumber extraction failed: {e}")
     
     if not text.strip():
+        text, page_index = "", PageIndex()
         try:
             images = convert_from_bytes(uploaded_file.read())
-            for img in images:
+            for page_number, img in enumerate(images, 1):
+                page_index.add_page(len(text), page_number)
                 text += pytesseract.image_to_string(img) + "\n"
         except Exception as e:
             st.error(f"OCR extraction failed: {e}")
     
-    return text
+    return text, page_index
 
 def translate_text(text, target_lang="hi"):
     """Translate text to target language"""
@@ -387,7 +396,7 @@ with tab1:
     if uploaded_file:
         with st.spinner("🔍 Extracting and analyzing contract..."):
             # Extract text
-            contract_text = extract_text_from_pdf(uploaded_file)
+            contract_text, page_index = extract_text_from_pdf(uploaded_file)
             st.session_state.contract_text = contract_text
             
             if contract_text.strip():
@@ -398,7 +407,7 @@ with tab1:
                 classification = classifier.classify(contract_text)
                 
                 # Risk Analysis
-                risk_analysis = risk_analyzer.analyze(contract_text)
+                risk_analysis = risk_analyzer.analyze(contract_text, page_index=page_index)
                 
                 # Store results
                 st.session_state.classification = classification
@@ -476,6 +485,13 @@ with tab2:
                 <p><strong>Total Findings:</strong> {risk_analysis['total_findings']}</p>
             </div>
             """, unsafe_allow_html=True)
+            
+            if risk_analysis.get('score_explanation'):
+                with st.expander("Why this score?"):
+                    for factor in risk_analysis['score_explanation']:
+                        kind, _, rule = factor['feature'].partition(':')
+                        label = f"{rule.replace('_', ' ').title()} ({kind})" if rule else kind.replace('_', ' ')
+                        st.markdown(f"- {label}: {factor['contribution']:+.2f}")
         
         with col2:
             st.plotly_chart(
@@ -502,6 +518,13 @@ with tab2:
                         st.info(finding['context'][:300] + "...")
                     
                     st.markdown(f"**Occurrences:** {finding['occurrences']}")
+                    
+                    # Every occurrence with its page, so reviewers can jump straight to it
+                    contract_text = st.session_state.contract_text
+                    for location in finding.get('locations', [])[:20]:
+                        page = f"Page {location['page']}" if location['page'] else "Text"
+                        snippet = " ".join(contract_text[max(0, location['start'] - 60):location['end'] + 60].split())
+                        st.caption(f"📍 {page}, char {location['page_offset']}: …{snippet}…")
         else:
             st.success("✅ No significant risk factors identified!")
         
@@ -510,15 +533,7 @@ with tab2:
         if st.button("📄 Generate Professional PDF Report", type="primary"):
             with st.spinner("Generating report..."):
                 try:
-                    report_dir = "generated_reports"
-                    os.makedirs(report_dir, exist_ok=True)
-                    
-                    report_path = os.path.join(
-                        report_dir,
-                        f"contract_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-                    )
-                    
-                    generator = ReportGenerator(report_path)
+                    generator = ReportGenerator()  # rendered in memory, no temp file
                     generator.add_cover_page(
                         uploaded_file.name if uploaded_file else "Contract Analysis",
                         classification['contract_type']
@@ -531,15 +546,13 @@ with tab2:
                     )
                     generator.add_risk_findings(risk_analysis['findings'])
                     generator.add_footer_note()
-                    generator.generate()
                     
-                    with open(report_path, "rb") as f:
-                        st.download_button(
-                            "⬇️ Download Report",
-                            f,
-                            file_name=f"contract_report_{datetime.now().strftime('%Y%m%d')}.pdf",
-                            mime="application/pdf"
-                        )
+                    st.download_button(
+                        "⬇️ Download Report",
+                        generator.generate_bytes(),
+                        file_name=f"contract_report_{datetime.now().strftime('%Y%m%d')}.pdf",
+                        mime="application/pdf"
+                    )
                     st.success("✅ Report generated successfully!")
                 except Exception as e:
                     st.error(f"Error generating report: {e}")
@@ -555,6 +568,7 @@ with tab3:
             clauses = clause_extractor.extract_clauses(st.session_state.contract_text)
             clause_summary = clause_extractor.summarize_clauses(clauses)
             key_terms = clause_extractor.extract_key_terms(st.session_state.contract_text)
+            obligations = clause_extractor.extract_all_obligations(st.session_state.contract_text)
         
         # Summary
         col1, col2, col3 = st.columns(3)
@@ -588,6 +602,15 @@ with tab3:
             st.subheader("📖 Defined Terms")
             for term, definition in list(key_terms.items())[:10]:
                 st.markdown(f"**{term}:** {definition}")
+        
+        # Obligations by party
+        if any(obligations.values()):
+            st.subheader("📌 Obligations by Party")
+            for party, items in obligations.items():
+                if items:
+                    with st.expander(f"{party} ({len(items)})"):
+                        for item in items:
+                            st.markdown(f"- {item['obligation']}")
     else:
         st.info("📤 Please upload a contract in the 'Upload & Analyze' tab first.")
 
@@ -607,8 +630,8 @@ with tab4:
     if file1 and file2:
         if st.button("🔍 Compare Contracts"):
             with st.spinner("Analyzing contracts..."):
-                text1 = extract_text_from_pdf(file1)
-                text2 = extract_text_from_pdf(file2)
+                text1, _ = extract_text_from_pdf(file1)
+                text2, _ = extract_text_from_pdf(file2)
                 
                 comparison = risk_analyzer.compare_contracts(text1, text2)
                 
@@ -631,6 +654,27 @@ with tab4:
                 st.success(f"**Safer Contract:** {comparison['comparison']['safer_contract']}")
                 st.metric("Risk Score Difference", 
                          f"{abs(comparison['comparison']['risk_score_diff']):.2f}")
+                
+                # Clause-aligned redline
+                st.markdown("---")
+                st.subheader("📝 Redline (Contract 2 vs Contract 1)")
+                redline = contract_differ.diff(text1, text2)
+                stats = redline['stats']
+                
+                col1, col2, col3, col4 = st.columns(4)
+                col1.metric("Unchanged", stats['unchanged'])
+                col2.metric("Modified", stats['modified'])
+                col3.metric("Added", stats['added'])
+                col4.metric("Removed", stats['removed'])
+                
+                for section in redline['sections']:
+                    if section['status'] == 'unchanged':
+                        continue
+                    with st.expander(f"{section['status'].title()}: {section['title'][:80]}"):
+                        st.markdown(
+                            ContractDiffer.render_redline_html(section['changes']),
+                            unsafe_allow_html=True
+                        )
 
 # Tab 5: History
 with tab5:
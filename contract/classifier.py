@@ -2,6 +2,10 @@
 import re
 import torch
 from transformers import AutoTokenizer, AutoModelForSequenceClassification
+from utils.rule_engine import get_rule_engine
+from utils.risk_scoring import RiskScorer
+
+risk_scorer = RiskScorer.load()
 
 # Load fine-tuned model if available, else fall back to keyword-based
 try:
@@ -40,26 +44,21 @@ def detect_contract_type(text: str) -> str:
             return CONTRACT_TYPES[4]
 
 def risk_score(contract_text):
-    risky_keywords = {
-        "penalty": ("High", "Could impose financial burden on the signer."),
-        "termination": ("Medium", "The contract may be ended abruptly without enough notice."),
-        "liability": ("High", "Exposes signer to potential unlimited responsibility."),
-        "indemnify": ("High", "One party must cover losses/damages of the other."),
-        "breach": ("Medium", "Strict consequences if obligations are not met."),
-        "damages": ("Medium", "Compensation obligations in case of failure.")
-    }
+    # Keyword rules live in the shared rulebook (rules/risk_rules.json, "basic" ruleset)
+    rulebook, matches = get_rule_engine().match("basic", contract_text)
 
-    score = 0
     findings = []
 
-    for word, (severity, explanation) in risky_keywords.items():
-        if word.lower() in contract_text.lower():
-            weight = 3 if severity == "High" else 2
-            score += weight
+    for word, rule in rulebook.rules("basic").items():
+        if word in matches:
             findings.append({
                 "term": word,
-                "severity": severity,
-                "explanation": explanation
+                "rule": word,
+                "severity": rule["severity"],
+                "explanation": rule["explanation"],
+                "occurrences": len(matches[word])
             })
 
-    return min(score, 10), findings
\ No newline at end of file
+    # Length-normalized score, so long contracts are not penalized for repeating a term
+    score = risk_scorer.score(rulebook.rules("basic"), findings, len(contract_text.split()))["risk_score"]
+    return score, findings
\ No newline at end of file
@@ -4,6 +4,7 @@ import PyPDF2, pdfplumber, pytesseract
 from pdf2image import convert_from_bytes
 from transformers import pipeline
 from classifier import detect_contract_type, risk_score
+from utils.rule_engine import get_rule_engine
 from deep_translator import GoogleTranslator
 
 # -----------------------------
@@ -45,25 +46,18 @@ def chunk_text(text, chunk_size=500):
 
 def detect_unfavorable_terms(text: str):
     """Identify unfavorable contract terms with explanations."""
-    unfavorable_dict = {
-        "termination without notice": "Allows one party to end the contract suddenly, leaving the other vulnerable.",
-        "auto-renewal": "The contract may renew automatically without explicit consent, locking the business in.",
-        "unlimited liability": "Exposes the SME to very high financial risk.",
-        "non-compete": "Restricts the SME from doing other business activities, may be too broad.",
-        "arbitration outside india": "Legal disputes may become costly and inconvenient if handled abroad."
-    }
+    rulebook, matches = get_rule_engine().match("unfavorable_terms", text)
 
     findings = []
-    text_lower = text.lower()
 
-    for term, explanation in unfavorable_dict.items():
-        if term in text_lower:
-            idx = text_lower.find(term)
-            snippet = text[max(0, idx - 50): idx + len(term) + 50]
+    for term, rule in rulebook.rules("unfavorable_terms").items():
+        if term in matches:
+            idx, end = matches[term][0]
+            snippet = text[max(0, idx - 50): end + 50]
 
             findings.append({
                 "term": term,
-                "explanation": explanation,
+                "explanation": rule["explanation"],
                 "snippet": snippet.strip()
             })
     return findings
@@ -0,0 +1,113 @@
+"""
+Async database engine and sessions for the API (SQLAlchemy asyncio)
+
+Streamlit and scripts keep using the synchronous SessionLocal/get_db_session
+from database.connection; both paths share the same database and settings.
+"""
+import os
+from typing import AsyncIterator
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, StaticPool
+
+from .connection import (
+    DATABASE_URL, DB_MAX_OVERFLOW, DB_POOL_RECYCLE, DB_POOL_SIZE, DB_POOL_TIMEOUT,
+    SQLITE_READ_POOL_SIZE, RoutingSession, _is_memory_sqlite, _sqlite_pragmas
+)
+
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg"}
+
+
+def async_database_url(url: str) -> str:
+    """DATABASE_URL with its driver swapped for the asyncio one (aiosqlite/asyncpg)"""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    driver = ASYNC_DRIVERS.get(backend)
+    if driver is None:
+        raise ValueError(f"No asyncio driver configured for '{backend}' databases")
+    return parsed.set(drivername=f"{backend}+{driver}").render_as_string(hide_password=False)
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or async_database_url(DATABASE_URL)
+
+
+def _create_async_sqlite_engines(url: str):
+    """Async counterpart of connection._create_sqlite_engines: one writer, a read pool"""
+    write_engine = create_async_engine(
+        url,
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=DB_POOL_TIMEOUT,
+    )
+    read_engine = create_async_engine(
+        url,
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=SQLITE_READ_POOL_SIZE,
+        max_overflow=SQLITE_READ_POOL_SIZE,
+        pool_timeout=DB_POOL_TIMEOUT,
+    )
+
+    @event.listens_for(write_engine.sync_engine, "connect")
+    def _writer_connect(dbapi_connection, connection_record):
+        _sqlite_pragmas(dbapi_connection, read_only=False)
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(write_engine.sync_engine, "begin")
+    def _writer_begin(connection):
+        connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+    @event.listens_for(read_engine.sync_engine, "connect")
+    def _reader_connect(dbapi_connection, connection_record):
+        _sqlite_pragmas(dbapi_connection, read_only=True)
+
+    return write_engine, read_engine
+
+
+if ASYNC_DATABASE_URL.startswith("sqlite") and _is_memory_sqlite(ASYNC_DATABASE_URL):
+    # Note: a separate in-memory database from the synchronous engine's
+    async_engine = create_async_engine(ASYNC_DATABASE_URL, poolclass=StaticPool)
+    async_read_engine = async_engine
+elif ASYNC_DATABASE_URL.startswith("sqlite"):
+    async_engine, async_read_engine = _create_async_sqlite_engines(ASYNC_DATABASE_URL)
+else:
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        pool_pre_ping=True,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+    )
+    async_read_engine = async_engine
+
+
+class AsyncRoutingSession(RoutingSession):
+    """RoutingSession over the async engines (AsyncSession drives it through sync_engine)"""
+
+    writer = async_engine.sync_engine
+    reader = async_read_engine.sync_engine
+
+
+# expire_on_commit=False: attributes stay readable after commit without an implicit (sync) refresh
+if async_read_engine is async_engine:
+    AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+else:
+    AsyncSessionLocal = async_sessionmaker(
+        sync_session_class=AsyncRoutingSession, autoflush=False, expire_on_commit=False
+    )
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    """Get async database session (FastAPI dependency)"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def dispose_async_engines():
+    """Close pooled async connections (call on application shutdown)"""
+    await async_engine.dispose()
+    if async_read_engine is not async_engine:
+        await async_read_engine.dispose()
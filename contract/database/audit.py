@@ -0,0 +1,149 @@
+"""
+Append-only audit log: in-memory queue flushed to audit_logs in batches on a background thread
+"""
+import os
+import queue
+import atexit
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from .connection import SessionLocal
+from .models import AuditLog
+
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "200"))
+AUDIT_FLUSH_INTERVAL = float(os.getenv("AUDIT_FLUSH_INTERVAL", "2.0"))
+AUDIT_QUEUE_SIZE = int(os.getenv("AUDIT_QUEUE_SIZE", "50000"))
+
+
+class AuditLogWriter:
+    """
+    Batched writer for AuditLog rows
+
+    `log` only timestamps the event and puts it on a queue, so request
+    handlers never wait on the database. A daemon thread inserts queued
+    events in one transaction per batch, whenever `batch_size` events are
+    waiting or `flush_interval` seconds have passed. `close` drains the
+    queue, so events survive a graceful shutdown.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal,
+                 batch_size: int = AUDIT_BATCH_SIZE, flush_interval: float = AUDIT_FLUSH_INTERVAL,
+                 max_queue: int = AUDIT_QUEUE_SIZE):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.written = 0
+        self.dropped = 0
+        self.failed_batches = 0
+        self._queue: "queue.Queue[Optional[Dict]]" = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start the flusher thread (idempotent)"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="audit-log-writer", daemon=True)
+                self._thread.start()
+
+    def log(self, action: str, user_id: int = None, resource_type: str = None, resource_id: int = None,
+            details: Dict = None, ip_address: str = None):
+        """Queue one audit event (never blocks; counts and drops events if the queue is full)"""
+        event = {
+            "user_id": user_id,
+            "action": action,
+            "resource_type": resource_type,
+            "resource_id": resource_id,
+            "details": details,
+            "ip_address": ip_address,
+            "timestamp": datetime.utcnow(),
+        }
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self.dropped += 1
+            if self.dropped == 1 or self.dropped % 1000 == 0:
+                print(f"Warning: audit queue full, {self.dropped} events dropped")
+
+    def close(self, timeout: float = 10.0):
+        """Flush everything queued so far and stop the thread"""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is None or not thread.is_alive():
+            self._drain()  # never started, or died: write what is queued synchronously
+            return
+        self._queue.put(None)  # stop sentinel, after every queued event
+        thread.join(timeout)
+
+    def stats(self) -> Dict:
+        return {
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed_batches": self.failed_batches
+        }
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch: List[Dict] = []
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    event = self._queue.get(timeout=max(deadline - time.monotonic(), 0.0))
+                except queue.Empty:
+                    break
+                if event is None:
+                    stopping = True
+                    break
+                batch.append(event)
+            if batch:
+                self._write(batch)
+
+    def _drain(self):
+        batch = []
+        while True:
+            try:
+                event = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if event is not None:
+                batch.append(event)
+        for i in range(0, len(batch), self.batch_size):
+            self._write(batch[i:i + self.batch_size])
+
+    def _write(self, batch: List[Dict]):
+        """Insert one batch in a single transaction (a failed batch is reported, not retried)"""
+        db = self.session_factory()
+        try:
+            db.bulk_insert_mappings(AuditLog, batch)
+            db.commit()
+            self.written += len(batch)
+        except Exception as e:
+            db.rollback()
+            self.failed_batches += 1
+            print(f"Warning: {len(batch)} audit events not written ({type(e).__name__}: {e})")
+        finally:
+            db.close()
+
+
+_writer: Optional[AuditLogWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_audit_writer() -> AuditLogWriter:
+    """Process-wide audit writer, started on first use and flushed at interpreter exit"""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                writer = AuditLogWriter()
+                writer.start()
+                atexit.register(writer.close)
+                _writer = writer
+    return _writer
@@ -2,9 +2,10 @@
 Database connection and session management
 """
 import os
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, inspect, text
 from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import QueuePool, StaticPool
+from sqlalchemy.sql.expression import UpdateBase
 from dotenv import load_dotenv
 from .models import Base
 
@@ -12,23 +13,174 @@ load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./legal_fly.db")
 
+# SQLite tuning
+SQLITE_READ_POOL_SIZE = int(os.getenv("SQLITE_READ_POOL_SIZE", "8"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_CACHE_KB = int(os.getenv("SQLITE_CACHE_KB", "65536"))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+# Server database pool
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+
+
+def _is_memory_sqlite(url: str) -> bool:
+    return url in ("sqlite://", "sqlite:///:memory:") or "mode=memory" in url
+
+
+def _sqlite_pragmas(dbapi_connection, read_only: bool):
+    """Per-connection SQLite settings (WAL lets readers run alongside the writer)"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_KB}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    if read_only:
+        cursor.execute("PRAGMA query_only=ON")
+    cursor.close()
+
+
+def _create_sqlite_engines(url: str):
+    """
+    A read pool plus one serialized writer connection
+
+    All writes go through a single pooled connection (pool_size=1, no
+    overflow), so writers queue in the pool instead of failing with
+    "database is locked"; each write transaction takes the lock up front
+    with BEGIN IMMEDIATE.
+    """
+    write_engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False},
+        poolclass=QueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=DB_POOL_TIMEOUT,
+    )
+    read_engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False},
+        poolclass=QueuePool,
+        pool_size=SQLITE_READ_POOL_SIZE,
+        max_overflow=SQLITE_READ_POOL_SIZE,
+        pool_timeout=DB_POOL_TIMEOUT,
+    )
+
+    @event.listens_for(write_engine, "connect")
+    def _writer_connect(dbapi_connection, connection_record):
+        _sqlite_pragmas(dbapi_connection, read_only=False)
+        # Let SQLAlchemy's "begin" event emit BEGIN instead of pysqlite's deferred BEGIN
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(write_engine, "begin")
+    def _writer_begin(connection):
+        connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+    @event.listens_for(read_engine, "connect")
+    def _reader_connect(dbapi_connection, connection_record):
+        _sqlite_pragmas(dbapi_connection, read_only=True)
+
+    return write_engine, read_engine
+
+
 # Create engine with appropriate settings
-if DATABASE_URL.startswith("sqlite"):
+if DATABASE_URL.startswith("sqlite") and _is_memory_sqlite(DATABASE_URL):
+    # In-memory databases exist per connection: share a single one
     engine = create_engine(
         DATABASE_URL,
         connect_args={"check_same_thread": False},
         poolclass=StaticPool,
     )
+    read_engine = engine
+elif DATABASE_URL.startswith("sqlite"):
+    engine, read_engine = _create_sqlite_engines(DATABASE_URL)
 else:
-    engine = create_engine(DATABASE_URL, pool_pre_ping=True)
+    engine = create_engine(
+        DATABASE_URL,
+        pool_pre_ping=True,
+        poolclass=QueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+    )
+    read_engine = engine
+
+
+class RoutingSession(Session):
+    """
+    Sends reads to the read pool and writes to the writer engine
+
+    Once a transaction has written, its later reads also use the writer so
+    they see the session's own uncommitted changes.
+    """
+
+    _writing = False
+    writer = engine
+    reader = read_engine
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self._writing or self._flushing or isinstance(clause, UpdateBase):
+            self._writing = True
+            return self.writer
+        return self.reader
+
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+@event.listens_for(RoutingSession, "after_transaction_end")
+def _reset_routing(session, transaction):
+    if transaction.parent is None:
+        session._writing = False
+
+
+if read_engine is engine:
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+else:
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, class_=RoutingSession)
+
+
+def _add_missing_columns() -> set:
+    """
+    ALTER TABLE ADD COLUMN for nullable columns added to existing tables
+
+    Returns:
+        Set of "table.column" names that were added
+    """
+    added = set()
+    with engine.begin() as connection:
+        inspector = inspect(connection)
+        for table in Base.metadata.sorted_tables:
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing or not column.nullable:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+                added.add(f"{table.name}.{column.name}")
+    return added
 
 
 def init_db():
     """Initialize database tables"""
     Base.metadata.create_all(bind=engine)
 
+    # create_all skips tables that already exist; add columns and indexes introduced since
+    added = _add_missing_columns()
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+    if "contracts.latest_analysis_id" in added:
+        with engine.begin() as connection:
+            connection.execute(text(
+                "UPDATE contracts SET latest_analysis_id = ("
+                "SELECT a.id FROM contract_analyses a WHERE a.contract_id = contracts.id "
+                "ORDER BY a.created_at DESC, a.id DESC LIMIT 1)"
+            ))
+
 
 def get_db() -> Session:
     """Get database session"""
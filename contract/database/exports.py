@@ -0,0 +1,206 @@
+"""
+Streaming exports of contracts, analyses, findings and clauses (JSONL, CSV, Parquet)
+
+Rows are read in batches through a server-side cursor (yield_per) and
+written out batch by batch, so memory use does not grow with the portfolio.
+"""
+import io
+import os
+import csv
+import json
+from datetime import date, datetime
+from typing import AsyncIterator, Dict, Iterator, List
+
+from sqlalchemy import Boolean, Date, DateTime, Float, Integer, JSON, Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from .models import Clause, Contract, ContractAnalysis, RiskFinding
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+EXPORT_FORMATS = ("jsonl", "csv", "parquet")
+
+
+def _model_columns(model, exclude=()) -> List:
+    """Mapped attributes of every table column, in table order, so exports follow the model"""
+    return [getattr(model, column.key) for column in model.__table__.columns if column.key not in exclude]
+
+
+# Exported columns per dataset (no raw text blobs or server paths)
+EXPORT_COLUMNS = {
+    "contracts": _model_columns(Contract, exclude=("text_content", "file_path")),
+    "analyses": _model_columns(ContractAnalysis),
+    "findings": _model_columns(RiskFinding),
+    "clauses": _model_columns(Clause),
+}
+
+
+def export_query(dataset: str, user_id: int = None) -> Select:
+    """Rows of one dataset in id order, optionally limited to a user's contracts"""
+    if dataset not in EXPORT_COLUMNS:
+        raise ValueError(f"Unknown dataset '{dataset}' (expected one of {', '.join(EXPORT_COLUMNS)})")
+    columns = EXPORT_COLUMNS[dataset]
+    query = select(*columns)
+    if user_id is not None:
+        if dataset == "clauses":
+            query = query.join(Contract, Contract.id == Clause.contract_id).where(Contract.user_id == user_id)
+        else:
+            query = query.where(columns[0].class_.user_id == user_id)
+    return query.order_by(columns[0])
+
+
+def export_columns(dataset: str) -> List[str]:
+    return [column.key for column in EXPORT_COLUMNS[dataset]]
+
+
+def iter_batches(db: Session, dataset: str, user_id: int = None,
+                 batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[List[Dict]]:
+    """Rows as dicts, `batch_size` at a time, from a server-side cursor"""
+    result = db.execute(export_query(dataset, user_id).execution_options(yield_per=batch_size))
+    for partition in result.mappings().partitions():
+        yield [dict(row) for row in partition]
+
+
+async def aiter_batches(db: AsyncSession, dataset: str, user_id: int = None,
+                        batch_size: int = EXPORT_BATCH_SIZE) -> AsyncIterator[List[Dict]]:
+    """Async counterpart of iter_batches (AsyncSession.stream)"""
+    result = await db.stream(export_query(dataset, user_id).execution_options(yield_per=batch_size))
+    async for partition in result.mappings().partitions():
+        yield [dict(row) for row in partition]
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _flat(value):
+    """Scalar for CSV/Parquet cells: nested JSON as a string"""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=_json_default)
+    return value
+
+
+def jsonl_chunk(batch: List[Dict]) -> bytes:
+    return "".join(json.dumps(row, default=_json_default) + "\n" for row in batch).encode("utf-8")
+
+
+def csv_chunk(batch: List[Dict], columns: List[str], header: bool = False) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(columns)
+    for row in batch:
+        writer.writerow([
+            value.isoformat() if isinstance(value, (datetime, date)) else _flat(value)
+            for value in (row[column] for column in columns)
+        ])
+    return buffer.getvalue().encode("utf-8")
+
+
+def parquet_schema(dataset: str):
+    """Arrow schema from the column types (JSON columns are stored as JSON strings)"""
+    fields = []
+    for column in EXPORT_COLUMNS[dataset]:
+        column_type = column.type
+        if isinstance(column_type, Boolean):
+            arrow_type = pyarrow.bool_()
+        elif isinstance(column_type, Integer):
+            arrow_type = pyarrow.int64()
+        elif isinstance(column_type, Float):
+            arrow_type = pyarrow.float64()
+        elif isinstance(column_type, DateTime):
+            arrow_type = pyarrow.timestamp("us")
+        elif isinstance(column_type, Date):
+            arrow_type = pyarrow.date32()
+        else:  # String, Text, JSON
+            arrow_type = pyarrow.string()
+        fields.append(pyarrow.field(column.key, arrow_type))
+    return pyarrow.schema(fields)
+
+
+def write_parquet(db: Session, dataset: str, output, user_id: int = None,
+                  batch_size: int = EXPORT_BATCH_SIZE) -> int:
+    """
+    Write a dataset as Parquet, one row group per batch
+
+    Args:
+        output: File path or writable binary file
+
+    Returns:
+        Number of rows written
+    """
+    if pyarrow is None:
+        raise RuntimeError("Parquet export needs the 'pyarrow' package")
+    schema = parquet_schema(dataset)
+    json_columns = {column.key for column in EXPORT_COLUMNS[dataset] if isinstance(column.type, JSON)}
+    rows = 0
+    with pyarrow.parquet.ParquetWriter(output, schema, compression="zstd") as writer:
+        for batch in iter_batches(db, dataset, user_id, batch_size):
+            table = pyarrow.Table.from_pydict(
+                {
+                    name: [_flat(row[name]) for row in batch] if name in json_columns else [row[name] for row in batch]
+                    for name in schema.names
+                },
+                schema=schema
+            )
+            writer.write_table(table)
+            rows += len(batch)
+    return rows
+
+
+def export_dataset(db: Session, dataset: str, fmt: str, output, user_id: int = None,
+                   batch_size: int = EXPORT_BATCH_SIZE) -> int:
+    """
+    Export a dataset to a path or binary file in any EXPORT_FORMATS
+
+    Returns:
+        Number of rows written
+    """
+    if fmt == "parquet":
+        return write_parquet(db, dataset, output, user_id, batch_size)
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{fmt}' (expected one of {', '.join(EXPORT_FORMATS)})")
+
+    close = isinstance(output, str)
+    f = open(output, "wb") if close else output
+    rows = 0
+    try:
+        columns = export_columns(dataset)
+        if fmt == "csv":
+            f.write(csv_chunk([], columns, header=True))
+        for batch in iter_batches(db, dataset, user_id, batch_size):
+            f.write(jsonl_chunk(batch) if fmt == "jsonl" else csv_chunk(batch, columns))
+            rows += len(batch)
+    finally:
+        if close:
+            f.close()
+    return rows
+
+
+if __name__ == "__main__":
+    # python -m database.exports findings --format parquet --output findings.parquet
+    import argparse
+    from .connection import get_db_session
+
+    parser = argparse.ArgumentParser(description="Export Legal Fly data for analytics")
+    parser.add_argument("dataset", choices=list(EXPORT_COLUMNS))
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="jsonl")
+    parser.add_argument("--output", required=True)
+    parser.add_argument("--user-id", type=int, default=None, help="Only this user's data (default: everyone)")
+    parser.add_argument("--batch-size", type=int, default=EXPORT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    db = get_db_session()
+    try:
+        count = export_dataset(db, args.dataset, args.format, args.output, args.user_id, args.batch_size)
+    finally:
+        db.close()
+    print(f"✅ {count} {args.dataset} rows -> {args.output}")
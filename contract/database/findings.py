@@ -0,0 +1,74 @@
+"""
+Normalized risk findings: row builder and batched backfill from the JSON column
+"""
+from typing import Dict, Iterable, List
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from .models import ContractAnalysis, RiskFinding
+
+
+def finding_rows(analysis_id: int, contract_id: int, user_id: int, findings: Iterable[Dict]) -> List[Dict]:
+    """risk_findings rows (as mappings) for the findings of one analysis"""
+    rows = []
+    for finding in findings or []:
+        locations = finding.get("locations") or []
+        first = locations[0] if locations else {}
+        rows.append({
+            "analysis_id": analysis_id,
+            "contract_id": contract_id,
+            "user_id": user_id,
+            "rule": finding.get("rule"),
+            "risk_type": finding["risk_type"],
+            "severity": finding.get("severity"),
+            "weight": finding.get("weight"),
+            "occurrences": finding.get("occurrences"),
+            "detection": finding.get("detection"),
+            "start_offset": first.get("start"),
+            "end_offset": first.get("end"),
+            "page_number": first.get("page"),
+            "locations": locations or None,
+        })
+    return rows
+
+
+def store_findings(db: Session, analysis: ContractAnalysis):
+    """Insert the normalized findings of a flushed analysis (same transaction)"""
+    rows = finding_rows(analysis.id, analysis.contract_id, analysis.user_id, analysis.risk_factors)
+    if rows:
+        db.bulk_insert_mappings(RiskFinding, rows)
+
+
+def backfill_findings(db: Session, batch_size: int = 500, log=print) -> int:
+    """
+    Populate risk_findings for analyses that predate the table
+
+    Streams analyses in id order, one batch per transaction, skipping any
+    analysis that already has findings rows, so an interrupted run can be
+    restarted safely.
+
+    Returns:
+        Number of analyses backfilled
+    """
+    has_findings = select(RiskFinding.id).where(RiskFinding.analysis_id == ContractAnalysis.id).exists()
+    last_id, total = 0, 0
+    while True:
+        batch = db.execute(
+            select(ContractAnalysis.id, ContractAnalysis.contract_id, ContractAnalysis.user_id,
+                   ContractAnalysis.risk_factors)
+            .where(ContractAnalysis.id > last_id, ~has_findings)
+            .order_by(ContractAnalysis.id)
+            .limit(batch_size)
+        ).all()
+        if not batch:
+            return total
+
+        rows = [row for analysis in batch for row in finding_rows(*analysis)]
+        if rows:
+            db.bulk_insert_mappings(RiskFinding, rows)
+        db.commit()
+
+        last_id = batch[-1].id
+        total += len(batch)
+        log(f"  backfilled {total} analyses (up to id {last_id})")
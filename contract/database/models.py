@@ -2,9 +2,9 @@
 Database models for Legal Fly Pro
 """
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Float, Text, DateTime, ForeignKey, Boolean, JSON
+from sqlalchemy import Column, Integer, String, Float, Text, Date, DateTime, ForeignKey, Boolean, JSON, Index, UniqueConstraint, LargeBinary, event
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import deferred, relationship
 
 Base = declarative_base()
 
@@ -29,6 +29,11 @@ class User(Base):
 
 class Contract(Base):
     __tablename__ = "contracts"
+    __table_args__ = (
+        # Covers the contract listing: filter by user, keyset on (uploaded_at, id),
+        # and the listed columns, so pages are served from the index alone
+        Index("ix_contracts_user_uploaded", "user_id", "uploaded_at", "id", "title", "contract_type"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -37,20 +42,45 @@ class Contract(Base):
     file_name = Column(String(500))
     file_path = Column(String(1000))
     file_hash = Column(String(64), unique=True, index=True)  # SHA-256 hash
-    text_content = Column(Text)
+    text_content = deferred(Column(Text))  # Legacy rows only; full text lives in contract_texts
     page_count = Column(Integer)
     word_count = Column(Integer)
     uploaded_at = Column(DateTime, default=datetime.utcnow)
     last_analyzed = Column(DateTime)
+    # Newest analysis, kept current on insert (see _point_contract_at_analysis) so
+    # detail views load contract + latest analysis with one join
+    latest_analysis_id = Column(
+        Integer, ForeignKey("contract_analyses.id", use_alter=True, name="fk_contracts_latest_analysis")
+    )
     
     # Relationships
     user = relationship("User", back_populates="contracts")
-    analyses = relationship("ContractAnalysis", back_populates="contract", cascade="all, delete-orphan")
+    analyses = relationship(
+        "ContractAnalysis", back_populates="contract", cascade="all, delete-orphan",
+        foreign_keys="ContractAnalysis.contract_id"
+    )
+    latest_analysis = relationship("ContractAnalysis", foreign_keys=[latest_analysis_id], viewonly=True)
     clauses = relationship("Clause", back_populates="contract", cascade="all, delete-orphan")
+    deadlines = relationship("ContractDeadline", back_populates="contract", cascade="all, delete-orphan")
+
+
+class ContractText(Base):
+    """Full extracted contract text, compressed and stored once per file (content-addressed)"""
+    __tablename__ = "contract_texts"
+    
+    file_hash = Column(String(64), primary_key=True)  # SHA-256 of the uploaded file
+    codec = Column(String(10), nullable=False)  # "zstd" or "zlib"
+    data = Column(LargeBinary, nullable=False)
+    original_size = Column(Integer)  # characters
+    created_at = Column(DateTime, default=datetime.utcnow)
 
 
 class ContractAnalysis(Base):
     __tablename__ = "contract_analyses"
+    __table_args__ = (
+        # Analysis history of a contract, newest first
+        Index("ix_contract_analyses_contract_created", "contract_id", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     contract_id = Column(Integer, ForeignKey("contracts.id"), nullable=False)
@@ -71,12 +101,42 @@ class ContractAnalysis(Base):
     
     # Metadata
     analysis_duration = Column(Float)  # seconds
+    stage_timings = Column(JSON)  # seconds per pipeline stage (extraction, ocr, classification, ...)
     model_version = Column(String(50))
     created_at = Column(DateTime, default=datetime.utcnow)
     
     # Relationships
-    contract = relationship("Contract", back_populates="analyses")
+    contract = relationship("Contract", back_populates="analyses", foreign_keys=[contract_id])
     user = relationship("User", back_populates="analyses")
+    findings = relationship("RiskFinding", back_populates="analysis", cascade="all, delete-orphan")
+
+
+class RiskFinding(Base):
+    """One risk finding of an analysis (normalized from ContractAnalysis.risk_factors)"""
+    __tablename__ = "risk_findings"
+    __table_args__ = (
+        # "All of my contracts with <risk type>" is an index range scan
+        Index("ix_risk_findings_user_type", "user_id", "risk_type", "contract_id"),
+        Index("ix_risk_findings_type_severity", "risk_type", "severity"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    analysis_id = Column(Integer, ForeignKey("contract_analyses.id"), nullable=False, index=True)
+    contract_id = Column(Integer, ForeignKey("contracts.id"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    rule = Column(String(100))
+    risk_type = Column(String(100), nullable=False)
+    severity = Column(String(20))
+    weight = Column(Float)
+    occurrences = Column(Integer)
+    detection = Column(String(20))  # keyword, semantic or keyword+semantic
+    start_offset = Column(Integer)  # First occurrence
+    end_offset = Column(Integer)
+    page_number = Column(Integer)
+    locations = Column(JSON)  # Every occurrence: page, start, end, page_offset
+    
+    # Relationships
+    analysis = relationship("ContractAnalysis", back_populates="findings")
 
 
 class Clause(Base):
@@ -96,6 +156,75 @@ class Clause(Base):
     contract = relationship("Contract", back_populates="clauses")
 
 
+class ContractDeadline(Base):
+    __tablename__ = "contract_deadlines"
+    __table_args__ = (
+        # "Everything due in the next N days" for a user is a range scan on this index
+        Index("ix_contract_deadlines_user_due", "user_id", "due_date"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    contract_id = Column(Integer, ForeignKey("contracts.id"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    kind = Column(String(50))  # e.g., "renewal", "payment", "notice_period", "term"
+    anchor = Column(String(50))  # e.g., "expiration", "effective_date", "invoice"
+    direction = Column(String(10))  # "before" or "after" the anchor
+    duration_days = Column(Integer)
+    due_date = Column(Date)  # Null when the anchor date is unknown
+    description = Column(Text)
+    start_offset = Column(Integer)
+    end_offset = Column(Integer)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    # Relationships
+    contract = relationship("Contract", back_populates="deadlines")
+
+
+class PortfolioRiskLevel(Base):
+    """Rollup: analyses per (user, contract type, risk level), updated on each analysis insert"""
+    __tablename__ = "portfolio_risk_levels"
+    __table_args__ = (
+        UniqueConstraint("user_id", "contract_type", "risk_level", name="uq_portfolio_risk_levels"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    contract_type = Column(String(100), nullable=False)
+    risk_level = Column(String(20), nullable=False)
+    analysis_count = Column(Integer, nullable=False, default=0)
+    score_sum = Column(Float, nullable=False, default=0.0)
+
+
+class PortfolioRiskType(Base):
+    """Rollup: how often each risk type was found, per user"""
+    __tablename__ = "portfolio_risk_types"
+    __table_args__ = (
+        UniqueConstraint("user_id", "risk_type", name="uq_portfolio_risk_types"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    risk_type = Column(String(100), nullable=False)
+    severity = Column(String(20))
+    analysis_count = Column(Integer, nullable=False, default=0)
+    occurrence_count = Column(Integer, nullable=False, default=0)
+
+
+class PortfolioDailyRisk(Base):
+    """Rollup: analyses and risk score totals per user and day"""
+    __tablename__ = "portfolio_daily_risk"
+    __table_args__ = (
+        UniqueConstraint("user_id", "day", name="uq_portfolio_daily_risk"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    day = Column(Date, nullable=False)
+    analysis_count = Column(Integer, nullable=False, default=0)
+    score_sum = Column(Float, nullable=False, default=0.0)
+    high_risk_count = Column(Integer, nullable=False, default=0)  # High or Critical
+
+
 class ComparisonSession(Base):
     __tablename__ = "comparison_sessions"
     
@@ -108,7 +237,14 @@ class ComparisonSession(Base):
 
 
 class AuditLog(Base):
+    """Append-only; written in batches by database.audit.AuditLogWriter"""
     __tablename__ = "audit_logs"
+    __table_args__ = (
+        # Rows arrive in time order: a BRIN index on PostgreSQL stays tiny and
+        # suits time-range scans or range partitioning by timestamp
+        Index("ix_audit_logs_timestamp", "timestamp", postgresql_using="brin"),
+        Index("ix_audit_logs_user_timestamp", "user_id", "timestamp"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
@@ -118,3 +254,14 @@ class AuditLog(Base):
     details = Column(JSON)
     ip_address = Column(String(45))
     timestamp = Column(DateTime, default=datetime.utcnow)
+
+
+@event.listens_for(ContractAnalysis, "after_insert")
+def _point_contract_at_analysis(mapper, connection, target):
+    """Maintain Contract.latest_analysis_id in the inserting transaction"""
+    contracts = Contract.__table__
+    connection.execute(
+        contracts.update()
+        .where(contracts.c.id == target.contract_id)
+        .values(latest_analysis_id=target.id)
+    )
@@ -0,0 +1,122 @@
+"""
+Incrementally maintained portfolio rollups (risk levels, risk types, daily trend)
+"""
+from collections import defaultdict
+from typing import Dict, Optional
+
+from sqlalchemy import Table, delete, select
+from sqlalchemy.orm import Session
+
+from .models import (
+    Contract, ContractAnalysis, PortfolioDailyRisk, PortfolioRiskLevel, PortfolioRiskType
+)
+
+HIGH_RISK_LEVELS = ("High", "Critical")
+
+
+def _upsert(db: Session, table: Table, keys: Dict, increments: Dict, replace: Dict = None):
+    """
+    Add `increments` to the row identified by `keys`, creating it if missing
+
+    Uses INSERT ... ON CONFLICT DO UPDATE so concurrent writers never lose
+    an increment; other databases fall back to read-modify-write.
+    """
+    replace = replace or {}
+    dialect = db.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        stmt = insert(table).values(**keys, **increments, **replace)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(keys),
+            set_={
+                **{column: table.c[column] + stmt.excluded[column] for column in increments},
+                **{column: stmt.excluded[column] for column in replace},
+            }
+        )
+        db.execute(stmt)
+        return
+
+    conditions = [table.c[column] == value for column, value in keys.items()]
+    row = db.execute(select(table).where(*conditions).with_for_update()).first()
+    if row is None:
+        db.execute(table.insert().values(**keys, **increments, **replace))
+    else:
+        db.execute(
+            table.update().where(*conditions).values(
+                **{column: table.c[column] + value for column, value in increments.items()}, **replace
+            )
+        )
+
+
+def record_analysis(db: Session, analysis: ContractAnalysis, contract_type: Optional[str]):
+    """
+    Fold one new analysis into the rollups (call in the same transaction as the insert)
+    """
+    score = analysis.risk_score or 0.0
+    _upsert(
+        db, PortfolioRiskLevel.__table__,
+        keys={"user_id": analysis.user_id, "contract_type": contract_type or "Unknown",
+              "risk_level": analysis.risk_level or "Unknown"},
+        increments={"analysis_count": 1, "score_sum": score}
+    )
+    _upsert(
+        db, PortfolioDailyRisk.__table__,
+        keys={"user_id": analysis.user_id, "day": analysis.created_at.date()},
+        increments={"analysis_count": 1, "score_sum": score,
+                    "high_risk_count": int(analysis.risk_level in HIGH_RISK_LEVELS)}
+    )
+    for finding in analysis.risk_factors or []:
+        _upsert(
+            db, PortfolioRiskType.__table__,
+            keys={"user_id": analysis.user_id, "risk_type": finding["risk_type"]},
+            increments={"analysis_count": 1, "occurrence_count": finding.get("occurrences", 1)},
+            replace={"severity": finding.get("severity")}
+        )
+
+
+def rebuild_rollups(db: Session, batch_size: int = 500):
+    """Recompute all rollups from the analyses table (repair or first-time population)"""
+    for model in (PortfolioRiskLevel, PortfolioRiskType, PortfolioDailyRisk):
+        db.execute(delete(model))
+
+    levels = defaultdict(lambda: [0, 0.0])
+    days = defaultdict(lambda: [0, 0.0, 0])
+    types = defaultdict(lambda: [0, 0, None])
+
+    rows = db.execute(
+        select(ContractAnalysis.user_id, ContractAnalysis.risk_score, ContractAnalysis.risk_level,
+               ContractAnalysis.risk_factors, ContractAnalysis.created_at, Contract.contract_type)
+        .join(Contract, Contract.id == ContractAnalysis.contract_id)
+        .execution_options(yield_per=batch_size)
+    )
+    for user_id, score, level, factors, created_at, contract_type in rows:
+        score = score or 0.0
+        bucket = levels[(user_id, contract_type or "Unknown", level or "Unknown")]
+        bucket[0] += 1
+        bucket[1] += score
+        bucket = days[(user_id, created_at.date())]
+        bucket[0] += 1
+        bucket[1] += score
+        bucket[2] += int(level in HIGH_RISK_LEVELS)
+        for finding in factors or []:
+            bucket = types[(user_id, finding["risk_type"])]
+            bucket[0] += 1
+            bucket[1] += finding.get("occurrences", 1)
+            bucket[2] = finding.get("severity")
+
+    db.bulk_insert_mappings(PortfolioRiskLevel, [
+        {"user_id": u, "contract_type": t, "risk_level": l, "analysis_count": n, "score_sum": s}
+        for (u, t, l), (n, s) in levels.items()
+    ])
+    db.bulk_insert_mappings(PortfolioDailyRisk, [
+        {"user_id": u, "day": d, "analysis_count": n, "score_sum": s, "high_risk_count": h}
+        for (u, d), (n, s, h) in days.items()
+    ])
+    db.bulk_insert_mappings(PortfolioRiskType, [
+        {"user_id": u, "risk_type": r, "analysis_count": n, "occurrence_count": o, "severity": sev}
+        for (u, r), (n, o, sev) in types.items()
+    ])
+    db.commit()
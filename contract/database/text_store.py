@@ -0,0 +1,49 @@
+"""
+Compressed, content-addressed storage of full contract text
+"""
+import zlib
+from typing import Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from .models import Contract, ContractText
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+ZSTD_LEVEL = 10
+ZLIB_LEVEL = 6
+
+
+def compress_text(text: str) -> Tuple[str, bytes]:
+    """Compress text with zstd when available, else zlib; returns (codec, data)"""
+    raw = text.encode("utf-8")
+    if zstandard is not None:
+        return "zstd", zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(raw)
+    return "zlib", zlib.compress(raw, ZLIB_LEVEL)
+
+
+def decompress_text(codec: str, data: bytes) -> str:
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("Contract text is zstd-compressed; install the 'zstandard' package")
+        return zstandard.ZstdDecompressor().decompress(data).decode("utf-8")
+    return zlib.decompress(data).decode("utf-8")
+
+
+def store_text(db: Session, file_hash: str, text: str):
+    """Store the full text of a file once (no-op if that file's text is already stored)"""
+    if db.get(ContractText, file_hash) is not None:
+        return
+    codec, data = compress_text(text)
+    db.add(ContractText(file_hash=file_hash, codec=codec, data=data, original_size=len(text)))
+
+
+def load_text(db: Session, contract: Contract) -> Optional[str]:
+    """Full text of a contract (falls back to the truncated legacy column for old rows)"""
+    blob = db.get(ContractText, contract.file_hash) if contract.file_hash else None
+    if blob is not None:
+        return decompress_text(blob.codec, blob.data)
+    return contract.text_content
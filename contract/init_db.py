@@ -2,11 +2,23 @@
 Database initialization script
 Run this to set up the database for Legal Fly Pro
 """
-from database.connection import init_db
+from database.connection import init_db, get_db_session
 from database.models import Base
+from database.findings import backfill_findings
+from database.rollups import rebuild_rollups
+import argparse
 import os
 
 def main():
+    parser = argparse.ArgumentParser(description="Initialize the Legal Fly Pro database")
+    parser.add_argument("--rebuild-rollups", action="store_true",
+                        help="Recompute portfolio rollup tables from existing analyses")
+    parser.add_argument("--backfill-findings", action="store_true",
+                        help="Copy risk findings of existing analyses into the risk_findings table")
+    parser.add_argument("--batch-size", type=int, default=500,
+                        help="Analyses per transaction when backfilling")
+    args = parser.parse_args()
+    
     print("="*60)
     print("Legal Fly Pro - Database Initialization")
     print("="*60)
@@ -26,6 +38,20 @@ def main():
     try:
         init_db()
         print("  ✅ Database tables created successfully!")
+        if args.rebuild_rollups:
+            db = get_db_session()
+            try:
+                rebuild_rollups(db)
+            finally:
+                db.close()
+            print("  ✅ Portfolio rollups rebuilt!")
+        if args.backfill_findings:
+            db = get_db_session()
+            try:
+                count = backfill_findings(db, batch_size=args.batch_size)
+            finally:
+                db.close()
+            print(f"  ✅ Risk findings backfilled for {count} analyses!")
         print("\n🎉 Setup complete!")
         print("\nYou can now run:")
         print("  streamlit run app_pro.py")
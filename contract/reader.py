@@ -2,22 +2,38 @@
 import pdfplumber
 import pytesseract
 from pdf2image import convert_from_path
+from utils.page_index import PageIndex
+from utils.timing import timed
 
 def read_pdf(file_path):
-    text = ""
+    return read_pdf_pages(file_path)[0]
+
+def read_pdf_pages(file_path):
+    """Extract text and a page index (page start offsets) built while concatenating pages."""
+    parts, length = [], 0
+    pages = PageIndex()
     try:
-        with pdfplumber.open(file_path) as pdf:
+        with timed("extraction"), pdfplumber.open(file_path) as pdf:
             for i, page in enumerate(pdf.pages, start=1):
                 page_text = page.extract_text()
                 if page_text:
-                    text += f"[Page {i}]\n{page_text}\n"
+                    marker = f"[Page {i}]\n"
+                    pages.add_page(length + len(marker), i)
+                    parts.append(f"{marker}{page_text}\n")
+                    length += len(parts[-1])
     except Exception as e:
         print("Error reading with pdfplumber:", e)
 
-    if not text.strip():
+    if not "".join(parts).strip():
         print("No text found, using OCR...")
-        images = convert_from_path(file_path)
-        for i, img in enumerate(images, start=1):
-            text += f"[Page {i} OCR]\n{pytesseract.image_to_string(img)}\n"
+        parts, length = [], 0
+        pages = PageIndex()
+        with timed("ocr"):
+            images = convert_from_path(file_path)
+            for i, img in enumerate(images, start=1):
+                marker = f"[Page {i} OCR]\n"
+                pages.add_page(length + len(marker), i)
+                parts.append(f"{marker}{pytesseract.image_to_string(img)}\n")
+                length += len(parts[-1])
 
-    return text
\ No newline at end of file
+    return "".join(parts), pages
\ No newline at end of file
@@ -0,0 +1,252 @@
+"""
+Portfolio (batch) reports: per-contract sections rendered in worker processes and merged into one PDF
+"""
+import io
+import os
+import multiprocessing
+import uuid
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from PyPDF2 import PdfReader, PdfWriter
+from sqlalchemy import Select, select
+
+from database.models import Contract, ContractAnalysis
+from reports.pdf_generator import ReportGenerator
+from utils.timing import timed
+
+BATCH_REPORT_WORKERS = int(os.getenv("BATCH_REPORT_WORKERS", str(os.cpu_count() or 2)))
+BATCH_REPORT_KEEP_JOBS = int(os.getenv("BATCH_REPORT_KEEP_JOBS", "20"))
+# Workers start fresh ("forkserver"/"spawn"): forking the API process, which runs the
+# audit writer, render pool and event loop threads, can leave a child holding a dead lock
+BATCH_REPORT_START_METHOD = os.getenv(
+    "BATCH_REPORT_START_METHOD",
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
+
+def render_pool(workers: int = BATCH_REPORT_WORKERS) -> ProcessPoolExecutor:
+    """
+    Worker processes for render_section
+
+    With forkserver, the server preloads only this module (reportlab, PyPDF2)
+    and workers are forked from it.
+    """
+    context = multiprocessing.get_context(BATCH_REPORT_START_METHOD)
+    if BATCH_REPORT_START_METHOD == "forkserver":
+        context.set_forkserver_preload(["reports.batch_report"])
+    return ProcessPoolExecutor(max_workers=max(1, workers), mp_context=context)
+
+
+def portfolio_query(user_id: int, contract_ids: List[int] = None) -> Select:
+    """Contracts of a user with their latest analysis, as rows for portfolio_item"""
+    query = select(Contract.title, Contract.contract_type, ContractAnalysis.risk_score,
+                   ContractAnalysis.risk_level, ContractAnalysis.risk_factors, ContractAnalysis.created_at)\
+        .join(ContractAnalysis, ContractAnalysis.id == Contract.latest_analysis_id)\
+        .where(Contract.user_id == user_id)
+    if contract_ids:
+        query = query.where(Contract.id.in_(contract_ids))
+    return query.order_by(Contract.uploaded_at, Contract.id)
+
+
+def portfolio_item(row) -> Dict:
+    title, contract_type, risk_score, risk_level, findings, created_at = row
+    return {
+        "title": title,
+        "contract_type": contract_type,
+        "risk_score": risk_score,
+        "risk_level": risk_level,
+        "findings": findings or [],
+        "analysis_date": created_at
+    }
+
+
+def render_section(contract: Dict) -> bytes:
+    """
+    One contract's section as a standalone PDF (runs in a worker process)
+
+    Args:
+        contract: Dict with title, contract_type, risk_score, risk_level,
+            findings and optionally analysis_date (datetime)
+    """
+    generator = ReportGenerator()
+    analysis_date = contract.get('analysis_date')
+    generator.add_contract_section(
+        contract['title'],
+        contract.get('contract_type') or 'Unknown',
+        contract.get('risk_score'),
+        contract.get('risk_level'),
+        contract.get('findings') or [],
+        analysis_date.strftime("%B %d, %Y") if analysis_date else None
+    )
+    return generator.generate_bytes()
+
+
+def render_summary(contracts: List[Dict], title: str) -> bytes:
+    """Cover page and aggregate summary table of the portfolio"""
+    generator = ReportGenerator()
+    generator.add_cover_page(title, f"Portfolio of {len(contracts)} contracts")
+    generator.add_portfolio_summary(contracts)
+    return generator.generate_bytes()
+
+
+def merge_pdfs(parts: List[bytes]) -> bytes:
+    """Concatenate PDF documents"""
+    writer = PdfWriter()
+    for part in parts:
+        for page in PdfReader(io.BytesIO(part)).pages:
+            writer.add_page(page)
+    output = io.BytesIO()
+    writer.write(output)
+    return output.getvalue()
+
+
+def generate_batch_report(contracts: List[Dict], title: str = "Portfolio Risk Report",
+                          workers: int = BATCH_REPORT_WORKERS,
+                          progress: Callable[[int, int], None] = None, pool: Executor = None) -> bytes:
+    """
+    Render a combined report: summary first, then one section per contract
+
+    Sections are rendered in parallel worker processes; `progress(done, total)`
+    is called as each one finishes.
+
+    Args:
+        pool: Long-lived render_pool() to use; a temporary one is started otherwise
+
+    Returns:
+        PDF bytes
+    """
+    total = len(contracts)
+    sections: List[Optional[bytes]] = [None] * total
+    if total:
+        own_pool = pool is None
+        if own_pool:
+            pool = render_pool(min(workers, total))
+        try:
+            futures = {pool.submit(render_section, contract): i for i, contract in enumerate(contracts)}
+            for done, future in enumerate(as_completed(futures), 1):
+                sections[futures[future]] = future.result()
+                if progress:
+                    progress(done, total)
+        finally:
+            if own_pool:
+                pool.shutdown(wait=True)
+    return merge_pdfs([render_summary(contracts, title)] + sections)
+
+
+class BatchReportJobs:
+    """
+    Background batch report jobs with progress, for the API
+
+    Jobs run one at a time (each already uses every worker process) on one
+    worker pool, started with the first job and kept until close(); the
+    last `keep` finished jobs and their PDFs are kept in memory.
+    """
+
+    def __init__(self, workers: int = BATCH_REPORT_WORKERS, keep: int = BATCH_REPORT_KEEP_JOBS):
+        self.workers = workers
+        self.keep = keep
+        self._jobs: Dict[str, Dict] = {}
+        self._results: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+        self._runner = ThreadPoolExecutor(max_workers=1, thread_name_prefix="batch-report")
+        self._pool: Optional[ProcessPoolExecutor] = None  # only touched from the runner thread
+
+    def submit(self, contracts: List[Dict], title: str = "Portfolio Risk Report", user_id: int = None) -> Dict:
+        """Queue a batch report; returns the job status"""
+        job_id = uuid.uuid4().hex
+        job = {
+            "job_id": job_id,
+            "user_id": user_id,
+            "status": "queued",
+            "total": len(contracts),
+            "completed": 0,
+            "created_at": datetime.utcnow().isoformat(),
+            "finished_at": None,
+            "error": None
+        }
+        with self._lock:
+            self._jobs[job_id] = job
+        self._runner.submit(self._run, job_id, contracts, title)
+        return dict(job)
+
+    def status(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def result(self, job_id: str) -> Optional[bytes]:
+        with self._lock:
+            return self._results.get(job_id)
+
+    def _update(self, job_id: str, **fields):
+        with self._lock:
+            self._jobs[job_id].update(fields)
+
+    def _run(self, job_id: str, contracts: List[Dict], title: str):
+        self._update(job_id, status="running")
+        try:
+            if self._pool is None:
+                self._pool = render_pool(self.workers)
+            with timed("batch_report"):
+                pdf = generate_batch_report(
+                    contracts, title, self.workers,
+                    progress=lambda done, total: self._update(job_id, completed=done), pool=self._pool
+                )
+        except Exception as e:
+            if isinstance(e, BrokenProcessPool):
+                self._close_pool()  # a worker died; the next job starts a fresh pool
+            with self._lock:
+                self._jobs[job_id].update(status="failed", error=f"{type(e).__name__}: {e}",
+                                          finished_at=datetime.utcnow().isoformat())
+                self._prune()
+            return
+        with self._lock:
+            self._results[job_id] = pdf
+            self._jobs[job_id].update(status="done", finished_at=datetime.utcnow().isoformat())
+            self._prune()
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job["status"] in ("done", "failed")]
+        for job_id in finished[:-self.keep] if self.keep else finished:
+            self._jobs.pop(job_id, None)
+            self._results.pop(job_id, None)
+
+    def _close_pool(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+    def close(self):
+        self._runner.shutdown(wait=True)
+        self._close_pool()
+
+
+if __name__ == "__main__":
+    # python -m reports.batch_report --user-id 1 --output q3_portfolio.pdf
+    import argparse
+    from database.connection import get_db_session
+
+    parser = argparse.ArgumentParser(description="Render one combined risk report for many contracts")
+    parser.add_argument("--user-id", type=int, default=1)
+    parser.add_argument("--output", default="portfolio_report.pdf")
+    parser.add_argument("--title", default="Portfolio Risk Report")
+    parser.add_argument("--workers", type=int, default=BATCH_REPORT_WORKERS)
+    args = parser.parse_args()
+
+    db = get_db_session()
+    try:
+        items = [portfolio_item(row) for row in db.execute(portfolio_query(args.user_id))]
+    finally:
+        db.close()
+
+    pdf = generate_batch_report(
+        items, args.title, args.workers,
+        progress=lambda done, total: print(f"\r  rendered {done}/{total} contracts", end="", flush=True)
+    )
+    with open(args.output, "wb") as f:
+        f.write(pdf)
+    print(f"\n✅ {len(items)} contracts -> {args.output}")
@@ -9,69 +9,84 @@ from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph,
 from reportlab.platypus.flowables import HRFlowable
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT, TA_JUSTIFY
 from datetime import datetime
-from typing import Dict, List
+from functools import lru_cache
+from typing import BinaryIO, Dict, List, Union
+import io
 import os
 
+# Bump when the report layout changes: cached reports of older templates are not reused
+REPORT_TEMPLATE_VERSION = "1"
+
+
+@lru_cache(maxsize=None)
+def report_styles():
+    """Report stylesheet: the ReportLab samples plus our custom styles, built once per process"""
+    styles = getSampleStyleSheet()
+    styles.add(ParagraphStyle(
+        name='CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=24,
+        textColor=colors.HexColor('#1a1a1a'),
+        spaceAfter=30,
+        alignment=TA_CENTER
+    ))
+    
+    styles.add(ParagraphStyle(
+        name='SectionHeader',
+        parent=styles['Heading2'],
+        fontSize=16,
+        textColor=colors.HexColor('#2c5aa0'),
+        spaceBefore=20,
+        spaceAfter=12
+    ))
+    
+    styles.add(ParagraphStyle(
+        name='RiskHigh',
+        parent=styles['BodyText'],
+        textColor=colors.HexColor('#d32f2f'),
+        fontSize=11
+    ))
+    
+    styles.add(ParagraphStyle(
+        name='RiskMedium',
+        parent=styles['BodyText'],
+        textColor=colors.HexColor('#f57c00'),
+        fontSize=11
+    ))
+    
+    styles.add(ParagraphStyle(
+        name='RiskLow',
+        parent=styles['BodyText'],
+        textColor=colors.HexColor('#388e3c'),
+        fontSize=11
+    ))
+    return styles
+
 
 class ReportGenerator:
     """Generate professional PDF reports for contract analysis"""
     
-    def __init__(self, output_path: str):
-        """Initialize report generator"""
-        self.output_path = output_path
+    def __init__(self, output: Union[str, BinaryIO] = None):
+        """
+        Initialize report generator
+        
+        Args:
+            output: File path, or a writable binary stream; defaults to an
+                in-memory buffer (read it back with generate_bytes)
+        """
+        self.output = io.BytesIO() if output is None else output
+        self.output_path = output if isinstance(output, str) else None
         self.doc = SimpleDocTemplate(
-            output_path,
+            self.output,
             pagesize=letter,
             rightMargin=72,
             leftMargin=72,
             topMargin=72,
             bottomMargin=18,
         )
-        self.styles = getSampleStyleSheet()
-        self._create_custom_styles()
+        self.styles = report_styles()  # shared, read-only
         self.story = []
     
-    def _create_custom_styles(self):
-        """Create custom paragraph styles"""
-        self.styles.add(ParagraphStyle(
-            name='CustomTitle',
-            parent=self.styles['Heading1'],
-            fontSize=24,
-            textColor=colors.HexColor('#1a1a1a'),
-            spaceAfter=30,
-            alignment=TA_CENTER
-        ))
-        
-        self.styles.add(ParagraphStyle(
-            name='SectionHeader',
-            parent=self.styles['Heading2'],
-            fontSize=16,
-            textColor=colors.HexColor('#2c5aa0'),
-            spaceBefore=20,
-            spaceAfter=12
-        ))
-        
-        self.styles.add(ParagraphStyle(
-            name='RiskHigh',
-            parent=self.styles['BodyText'],
-            textColor=colors.HexColor('#d32f2f'),
-            fontSize=11
-        ))
-        
-        self.styles.add(ParagraphStyle(
-            name='RiskMedium',
-            parent=self.styles['BodyText'],
-            textColor=colors.HexColor('#f57c00'),
-            fontSize=11
-        ))
-        
-        self.styles.add(ParagraphStyle(
-            name='RiskLow',
-            parent=self.styles['BodyText'],
-            textColor=colors.HexColor('#388e3c'),
-            fontSize=11
-        ))
-    
     def add_cover_page(self, title: str, contract_type: str, date: str = None):
         """Add cover page to report"""
         if not date:
@@ -158,9 +173,10 @@ class ReportGenerator:
         self.story.append(explanation)
         self.story.append(Spacer(1, 0.3*inch))
     
-    def add_risk_findings(self, findings: List[Dict]):
+    def add_risk_findings(self, findings: List[Dict], new_page: bool = True):
         """Add detailed risk findings section"""
-        self.story.append(PageBreak())
+        if new_page:
+            self.story.append(PageBreak())
         self.story.append(Paragraph("Risk Analysis Details", self.styles['SectionHeader']))
         self.story.append(Spacer(1, 0.2*inch))
         
@@ -197,6 +213,16 @@ class ReportGenerator:
             )
             self.story.append(recommendation)
             
+            # Pages where the risk occurs
+            if finding.get('pages'):
+                pages = Paragraph(
+                    f"<b>Found on page(s):</b> {', '.join(str(p) for p in finding['pages'])} "
+                    f"({finding.get('occurrences', len(finding.get('locations', [])))} occurrence(s))",
+                    self.styles['Normal']
+                )
+                self.story.append(Spacer(1, 0.05*inch))
+                self.story.append(pages)
+            
             # Context if available
             if finding.get('context'):
                 context = Paragraph(
@@ -211,6 +237,64 @@ class ReportGenerator:
                                         color=colors.lightgrey))
             self.story.append(Spacer(1, 0.2*inch))
     
+    def add_contract_section(self, title: str, contract_type: str, risk_score: float, risk_level: str,
+                             findings: List[Dict], analysis_date: str = None):
+        """Add one contract of a portfolio report: heading, summary table and findings"""
+        self.story.append(Paragraph(title, self.styles['CustomTitle']))
+        details = f"<b>Contract Type:</b> {contract_type}"
+        if analysis_date:
+            details += f"<br/><b>Analysis Date:</b> {analysis_date}"
+        self.story.append(Paragraph(details, self.styles['Normal']))
+        self.add_executive_summary(risk_score, risk_level, len(findings or []))
+        self.add_risk_findings(findings or [], new_page=False)
+    
+    def add_portfolio_summary(self, contracts: List[Dict]):
+        """
+        Add the aggregate table of a portfolio report
+        
+        Args:
+            contracts: Dicts with title, contract_type, risk_score, risk_level, findings
+        """
+        self.story.append(Paragraph("Portfolio Summary", self.styles['SectionHeader']))
+        self.story.append(Spacer(1, 0.2*inch))
+        
+        levels = {}
+        for contract in contracts:
+            levels[contract['risk_level']] = levels.get(contract['risk_level'], 0) + 1
+        scores = [c['risk_score'] for c in contracts if c.get('risk_score') is not None]
+        overview = f"<b>Contracts:</b> {len(contracts)}<br/>"
+        if scores:
+            overview += f"<b>Average Risk Score:</b> {sum(scores) / len(scores):.2f}/10<br/>"
+        overview += "<b>By Risk Level:</b> " + ", ".join(
+            f"{level}: {levels[level]}" for level in ("Critical", "High", "Medium", "Low") if level in levels
+        )
+        self.story.append(Paragraph(overview, self.styles['Normal']))
+        self.story.append(Spacer(1, 0.3*inch))
+        
+        data = [['#', 'Contract', 'Type', 'Score', 'Level', 'Findings']]
+        for i, contract in enumerate(contracts, 1):
+            data.append([
+                str(i),
+                Paragraph(contract['title'][:80], self.styles['BodyText']),
+                Paragraph(str(contract.get('contract_type') or '')[:40], self.styles['BodyText']),
+                f"{contract['risk_score']}" if contract.get('risk_score') is not None else '-',
+                contract.get('risk_level') or '-',
+                str(len(contract.get('findings') or []))
+            ])
+        
+        table = Table(data, colWidths=[0.4*inch, 2.4*inch, 1.5*inch, 0.6*inch, 0.7*inch, 0.7*inch], repeatRows=1)
+        table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2c5aa0')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey)
+        ]))
+        self.story.append(table)
+    
     def add_clause_summary(self, clauses: List[Dict]):
         """Add clause analysis section"""
         self.story.append(PageBreak())
@@ -287,10 +371,17 @@ class ReportGenerator:
         para = Paragraph(disclaimer, self.styles['Italic'])
         self.story.append(para)
     
-    def generate(self) -> str:
-        """Generate the PDF report"""
+    def generate(self) -> Union[str, BinaryIO]:
+        """Generate the PDF report (returns the output path, or the stream written to)"""
+        self.doc.build(self.story)
+        return self.output_path or self.output
+    
+    def generate_bytes(self) -> bytes:
+        """Generate the PDF report in memory and return its bytes"""
+        if not isinstance(self.output, io.BytesIO):
+            raise ValueError("generate_bytes needs an in-memory ReportGenerator (no output given)")
         self.doc.build(self.story)
-        return self.output_path
+        return self.output.getvalue()
     
     def _get_status(self, value: int, warning_threshold: int, 
                     critical_threshold: int) -> str:
@@ -301,3 +392,25 @@ class ReportGenerator:
             return "Warning"
         else:
             return "Good"
+
+
+def render_contract_report(title: str, contract_type: str, risk_score: float, risk_level: str,
+                           findings: List[Dict], analysis_date: datetime = None) -> bytes:
+    """
+    Render the standard single-contract report in memory
+
+    Args:
+        analysis_date: Shown on the cover; pass the analysis time so re-rendering
+            the same analysis produces the same report
+
+    Returns:
+        PDF bytes
+    """
+    generator = ReportGenerator()
+    generator.add_cover_page(
+        title, contract_type, analysis_date.strftime("%B %d, %Y") if analysis_date else None
+    )
+    generator.add_executive_summary(risk_score, risk_level, len(findings or []))
+    generator.add_risk_findings(findings or [])
+    generator.add_footer_note()
+    return generator.generate_bytes()
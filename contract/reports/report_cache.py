@@ -0,0 +1,167 @@
+"""
+On-disk cache of rendered contract reports with background rendering and eviction
+"""
+import os
+import glob
+import time
+import uuid
+import atexit
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from reports.pdf_generator import REPORT_TEMPLATE_VERSION
+from utils.timing import timed
+
+REPORT_CACHE_DIR = os.getenv("REPORT_CACHE_DIR", "generated_reports")
+REPORT_CACHE_MAX_MB = int(os.getenv("REPORT_CACHE_MAX_MB", "500"))
+REPORT_CACHE_MAX_AGE_DAYS = float(os.getenv("REPORT_CACHE_MAX_AGE_DAYS", "30"))
+REPORT_RENDER_WORKERS = int(os.getenv("REPORT_RENDER_WORKERS", "2"))
+
+
+class ReportCache:
+    """
+    Rendered reports keyed by (contract_id, analysis_id, template version)
+
+    A report is rendered once per analysis, in memory, in a background
+    thread pool; concurrent requests for the same report share one render.
+    The bytes go back to the waiting requests directly and are written to
+    the cache under a temporary name then renamed, so readers never see a
+    partial PDF. A hit refreshes the file's mtime, which eviction uses as
+    "last used": files unused for `max_age` seconds are removed, then the
+    least recently used ones until the directory is under `max_bytes`.
+    """
+
+    def __init__(self, directory: str = REPORT_CACHE_DIR, max_bytes: int = REPORT_CACHE_MAX_MB * 1024 * 1024,
+                 max_age: float = REPORT_CACHE_MAX_AGE_DAYS * 86400, workers: int = REPORT_RENDER_WORKERS,
+                 template_version: str = REPORT_TEMPLATE_VERSION):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.template_version = template_version
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="report-render")
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def path_for(self, contract_id: int, analysis_id: int) -> str:
+        return os.path.join(
+            self.directory, f"contract_{contract_id}_analysis_{analysis_id}_t{self.template_version}.pdf"
+        )
+
+    def get(self, contract_id: int, analysis_id: int, render: Callable[..., bytes], *args, **kwargs) -> Future:
+        """
+        Future resolving to (path, data): data is the rendered PDF on a miss,
+        None on a hit (serve the file at path)
+
+        Args:
+            render: Called as render(*args, **kwargs) in the pool; returns PDF bytes
+        """
+        path = self.path_for(contract_id, analysis_id)
+        with self._lock:
+            pending = self._pending.get(path)
+            if pending is not None:
+                return pending
+            if os.path.exists(path):
+                self.hits += 1
+                os.utime(path)
+                done = Future()
+                done.set_result((path, None))
+                return done
+            self.misses += 1
+            future = self._executor.submit(self._render, path, contract_id, render, args, kwargs)
+            self._pending[path] = future
+        future.add_done_callback(lambda _: self._forget(path))
+        return future
+
+    def _forget(self, path: str):
+        with self._lock:
+            self._pending.pop(path, None)
+
+    def _render(self, path: str, contract_id: int, render: Callable[..., bytes], args: Tuple,
+                kwargs: Dict) -> Tuple[str, bytes]:
+        with timed("report_render"):
+            data = render(*args, **kwargs)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        # Reports of the contract's earlier analyses (or templates) are superseded
+        for old in glob.glob(os.path.join(self.directory, f"contract_{contract_id}_*.pdf")):
+            if old != path:
+                self._remove(old)
+        self.evict()
+        return path, data
+
+    def evict(self) -> int:
+        """
+        Apply the age and size limits
+
+        Returns:
+            Number of files removed
+        """
+        files: List[Tuple[float, int, str]] = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.endswith(".pdf"):
+                stat = entry.stat()
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        files.sort()  # least recently used first
+
+        removed = 0
+        cutoff = time.time() - self.max_age
+        total = sum(size for _, size, _ in files)
+        for mtime, size, path in files:
+            if mtime >= cutoff and total <= self.max_bytes:
+                break
+            if self._remove(path):
+                removed += 1
+                total -= size
+        return removed
+
+    def _remove(self, path: str) -> bool:
+        with self._lock:
+            if path in self._pending:
+                return False
+        try:
+            os.remove(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def stats(self) -> Dict:
+        files = [entry for entry in os.scandir(self.directory) if entry.name.endswith(".pdf")]
+        return {
+            "files": len(files),
+            "bytes": sum(entry.stat().st_size for entry in files),
+            "hits": self.hits,
+            "misses": self.misses,
+            "rendering": len(self._pending),
+            "template_version": self.template_version
+        }
+
+    def close(self):
+        """Finish in-flight renders and stop the pool"""
+        self._executor.shutdown(wait=True)
+
+
+_cache: Optional[ReportCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_report_cache() -> ReportCache:
+    """Process-wide report cache"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                cache = ReportCache()
+                atexit.register(cache.close)
+                _cache = cache
+    return _cache
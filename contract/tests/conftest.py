@@ -0,0 +1,7 @@
+"""
+Shared pytest setup: tests import the app modules the same way the app does (from the contract/ directory)
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
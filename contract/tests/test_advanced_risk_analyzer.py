@@ -0,0 +1,17 @@
+"""
+Risk analysis of contracts without classified clauses
+"""
+import pytest
+
+pytest.importorskip("sentence_transformers")
+
+from utils.advanced_risk_analyzer import AdvancedRiskAnalyzer
+
+
+def test_no_clauses_keeps_section_constrained_rules():
+    analyzer = AdvancedRiskAnalyzer()
+    analyzer.semantic_model = None
+
+    result = analyzer.analyze("Provider shall indemnify Customer.", clauses=[])
+
+    assert "broad_indemnification" in [finding["rule"] for finding in result["findings"]]
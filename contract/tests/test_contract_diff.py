@@ -0,0 +1,23 @@
+"""
+Clause-aligned redline: pagination alone is not a change
+"""
+from utils.contract_diff import ContractDiffer
+
+SECTIONS = [
+    "1. Term. This Agreement shall commence on the Effective Date and continue for twelve (12) months.",
+    "2. Payment. Customer shall pay each undisputed invoice within thirty (30) days of receipt.",
+    "3. Liability. Neither party shall be liable for indirect or consequential damages.",
+    "4. Confidentiality. The obligations in this Section survive for five (5) years after termination.",
+]
+
+
+def test_repaginated_contract_is_unchanged():
+    original = "[Page 1]\n" + "\n\n".join(SECTIONS[:2]) + "\n[Page 2]\n" + "\n\n".join(SECTIONS[2:]) + "\n"
+    revised = ("[Page 1]\n" + SECTIONS[0] + "\n[Page 2]\n" + "\n\n".join(SECTIONS[1:3])
+               + "\n[Page 3]\n" + SECTIONS[3] + "\n")
+
+    result = ContractDiffer().diff(original, revised)
+
+    assert result["stats"]["unchanged"] == len(SECTIONS)
+    assert result["stats"]["words_inserted"] == result["stats"]["words_deleted"] == 0
+    assert all(section["status"] == "unchanged" for section in result["sections"])
@@ -0,0 +1,49 @@
+"""
+Deadline extraction on a realistic master services agreement
+"""
+from datetime import date
+
+from utils.deadline_extractor import DURATION_PATTERN, DeadlineExtractor
+
+MSA = """MASTER SERVICES AGREEMENT
+
+This Master Services Agreement (the "Agreement") is entered into as of January 1, 2024 (the "Effective Date") by and between Acme Corp ("Customer") and Beta Systems LLC ("Vendor").
+
+1. Term. This Agreement shall commence on the Effective Date and continue for twelve (12) months, and shall automatically renew for successive one (1) year periods unless either party gives written notice of non-renewal at least sixty (60) days prior to expiration of the then-current term.
+
+2. Payment. Customer shall pay each undisputed invoice within thirty (30) days of receipt of the invoice.
+
+3. Termination for Breach. Either party may terminate this Agreement if the other party fails to cure a material breach within fifteen (15) business days after written notice.
+
+4. Confidentiality. The obligations in this Section shall survive for a period of five (5) years after termination of this Agreement.
+"""
+
+
+def test_msa_timeline():
+    timeline = DeadlineExtractor().extract(MSA, reference_date=date(2024, 6, 1))
+
+    assert timeline["effective_date"] == date(2024, 1, 1)
+    # Twelve months from the effective date, not the five-year survival period
+    assert timeline["expiration_date"] == date(2025, 1, 1)
+
+    by_value = {(d["kind"], d["duration_value"]): d for d in timeline["deadlines"]}
+    assert by_value[("term", 12)]["anchor"] is None
+    assert by_value[("term", 5)]["anchor"] == "termination"
+
+    renewal_notice = by_value[("renewal", 60)]
+    assert renewal_notice["direction"] == "before"
+    assert renewal_notice["due_date"] == date(2024, 11, 2)
+
+
+def test_until_uses_the_date_after_the_cue():
+    timeline = DeadlineExtractor().extract(
+        "This Agreement is valid from 1st April, 2024 until 31st March, 2025, unless terminated earlier."
+    )
+    assert timeline["effective_date"] == date(2024, 4, 1)
+    assert timeline["expiration_date"] == date(2025, 3, 31)
+
+
+def test_hyphenated_number_words():
+    extractor = DeadlineExtractor()
+    for phrase, value in (("twenty-one days", 21), ("forty five days", 45), ("ninety-nine days", 99)):
+        assert extractor._parse_duration(DURATION_PATTERN.search(phrase))[0] == value
@@ -0,0 +1,41 @@
+"""
+Risk scoring: untrained scores must not depend on contract length
+"""
+import pytest
+
+from utils.risk_scoring import RiskScorer
+from utils.rule_engine import DEFAULT_RULES_PATH, load_rulebook
+
+CONTRACT = """1. Services. Provider shall perform the services described in each statement of work.
+2. Liability. Provider accepts unlimited liability for data breaches caused by its personnel.
+3. Penalties. Late delivery incurs liquidated damages of 1% of the fees per week.
+4. Renewal. This Agreement shall automatically renew for successive one-year terms.
+5. Law. This Agreement is governed by the laws of Delaware.
+"""
+
+
+def findings_for(rulebook, text):
+    spans = rulebook.match("advanced", text)
+    return [{"rule": rule, "occurrences": len(rule_spans)} for rule, rule_spans in spans.items()]
+
+
+def test_repeated_contract_scores_the_same():
+    rulebook = load_rulebook(DEFAULT_RULES_PATH)
+    rules = rulebook.rules("advanced")
+    scorer = RiskScorer()
+
+    short_findings = findings_for(rulebook, CONTRACT)
+    long_text = CONTRACT * 100
+    long_findings = findings_for(rulebook, long_text)
+    assert short_findings, "sample contract should trip some rules"
+
+    short = scorer.score(rules, short_findings, len(CONTRACT.split()), 5)["risk_score"]
+    long = scorer.score(rules, long_findings, len(long_text.split()), 500)["risk_score"]
+    assert long == pytest.approx(short, abs=0.05)
+
+
+def test_weight_vector_cache_is_bounded():
+    scorer = RiskScorer()
+    for i in range(3 * scorer.MAX_CACHED_VECTORS):
+        scorer.weight_vector({f"rule_{i}": {"keywords": ["x"], "weight": 1}})
+    assert len(scorer._vectors) <= scorer.MAX_CACHED_VECTORS
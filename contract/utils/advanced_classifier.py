@@ -6,7 +6,8 @@ from transformers import AutoTokenizer, AutoModelForSequenceClassification
 from sentence_transformers import SentenceTransformer, util
 import numpy as np
 from typing import Dict, List, Tuple
-import re
+
+from utils.patterns import extract_contract_parties
 
 
 class AdvancedContractClassifier:
@@ -174,18 +175,4 @@ class AdvancedContractClassifier:
     
     def extract_contract_parties(self, text: str) -> List[str]:
         """Extract party names from contract"""
-        parties = []
-        
-        # Pattern for "between X and Y"
-        pattern1 = r"between\s+([^,\n]+?)\s+(?:and|&)\s+([^,\n]+?)(?:\.|,|\n)"
-        matches = re.finditer(pattern1, text, re.IGNORECASE)
-        for match in matches:
-            parties.extend([match.group(1).strip(), match.group(2).strip()])
-        
-        # Pattern for "Party A" and "Party B" definitions
-        pattern2 = r'"([^"]+)"\s*(?:\(|referred to as)'
-        matches = re.finditer(pattern2, text)
-        for match in matches:
-            parties.append(match.group(1).strip())
-        
-        return list(set(parties))[:5]  # Return unique parties, max 5
+        return extract_contract_parties(text, max_parties=5)
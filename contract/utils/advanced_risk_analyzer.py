@@ -1,173 +1,121 @@
 """
 Advanced risk analysis with ML-based scoring and explainability
 """
-import re
 from typing import Dict, List, Tuple
 from datetime import datetime
 import numpy as np
 from sentence_transformers import SentenceTransformer, util
 
+from utils.clause_extractor import ClauseExtractor
+from utils.page_index import PageIndex
+from utils.records import ClauseRecord
+from utils.section_parser import Section
+from utils.risk_scoring import RiskScorer
+from utils.rule_engine import CompiledRulebook, RuleEngine, get_rule_engine
+from utils.timing import timed
+
 
 class AdvancedRiskAnalyzer:
     """Advanced risk analysis with detailed clause detection"""
     
-    # Comprehensive risk patterns with severity and explanations
-    RISK_PATTERNS = {
-        "unlimited_liability": {
-            "keywords": ["unlimited liability", "unlimited indemnification", "full indemnity"],
-            "severity": "Critical",
-            "weight": 10,
-            "explanation": "Exposes you to unlimited financial responsibility for damages or losses.",
-            "recommendation": "Negotiate liability caps or insurance requirements."
-        },
-        "penalty_clause": {
-            "keywords": ["penalty", "liquidated damages", "punitive damages"],
-            "severity": "High",
-            "weight": 8,
-            "explanation": "Financial penalties may be imposed for breach or non-performance.",
-            "recommendation": "Review penalty amounts and ensure they're reasonable and capped."
-        },
-        "auto_renewal": {
-            "keywords": ["automatic renewal", "auto-renew", "automatically renew"],
-            "severity": "High",
-            "weight": 7,
-            "explanation": "Contract may renew without explicit consent, locking you in.",
-            "recommendation": "Add clear termination notice requirements before renewal."
-        },
-        "non_compete": {
-            "keywords": ["non-compete", "non-competition", "restrictive covenant"],
-            "severity": "High",
-            "weight": 8,
-            "explanation": "Restricts your ability to work or do business in certain areas.",
-            "recommendation": "Limit scope, geography, and duration of non-compete clause."
-        },
-        "termination_restrictions": {
-            "keywords": ["termination without cause", "no termination right", "irrevocable"],
-            "severity": "High",
-            "weight": 7,
-            "explanation": "Limited or no ability to exit the contract before term ends.",
-            "recommendation": "Negotiate termination for convenience with reasonable notice."
-        },
-        "jurisdiction_clause": {
-            "keywords": ["jurisdiction", "venue", "governing law"],
-            "severity": "Medium",
-            "weight": 5,
-            "explanation": "Disputes may be resolved in inconvenient or costly jurisdictions.",
-            "recommendation": "Negotiate for local or neutral jurisdiction."
-        },
-        "arbitration_clause": {
-            "keywords": ["binding arbitration", "mandatory arbitration", "arbitration only"],
-            "severity": "Medium",
-            "weight": 5,
-            "explanation": "Waives right to court litigation; arbitration may be costly.",
-            "recommendation": "Ensure arbitration rules are fair and costs are shared."
-        },
-        "broad_indemnification": {
-            "keywords": ["indemnify", "hold harmless", "defend and indemnify"],
-            "severity": "High",
-            "weight": 8,
-            "explanation": "You must compensate other party for their losses, even if not your fault.",
-            "recommendation": "Limit indemnification to your own negligence or willful misconduct."
-        },
-        "ip_assignment": {
-            "keywords": ["assign all rights", "transfer ownership", "work for hire", "all intellectual property"],
-            "severity": "High",
-            "weight": 7,
-            "explanation": "All intellectual property rights may be transferred to other party.",
-            "recommendation": "Negotiate to retain ownership or license back rights."
-        },
-        "confidentiality_perpetual": {
-            "keywords": ["perpetual confidentiality", "indefinite confidentiality", "confidential in perpetuity"],
-            "severity": "Medium",
-            "weight": 6,
-            "explanation": "Confidentiality obligations may last forever, even after contract ends.",
-            "recommendation": "Limit confidentiality period to 3-5 years post-termination."
-        },
-        "unilateral_modification": {
-            "keywords": ["modify at any time", "change terms unilaterally", "sole discretion to amend"],
-            "severity": "High",
-            "weight": 8,
-            "explanation": "Other party can change contract terms without your consent.",
-            "recommendation": "Require mutual agreement for material changes."
-        },
-        "no_warranties": {
-            "keywords": ["as is", "without warranty", "no warranties", "disclaim all warranties"],
-            "severity": "Medium",
-            "weight": 5,
-            "explanation": "Services/products provided with no guarantees of quality or fitness.",
-            "recommendation": "Negotiate for basic warranties of merchantability."
-        },
-        "data_rights": {
-            "keywords": ["data ownership", "use of data", "collect and use", "data rights"],
-            "severity": "Medium",
-            "weight": 6,
-            "explanation": "Broad rights to collect, use, or share your data.",
-            "recommendation": "Clarify data usage limits and privacy protections."
-        },
-        "force_majeure": {
-            "keywords": ["force majeure", "act of god", "events beyond control"],
-            "severity": "Low",
-            "weight": 3,
-            "explanation": "Contract may be suspended or terminated due to unforeseen events.",
-            "recommendation": "Ensure force majeure clause is balanced for both parties."
-        },
-        "entire_agreement": {
-            "keywords": ["entire agreement", "supersedes all prior", "final agreement"],
-            "severity": "Low",
-            "weight": 3,
-            "explanation": "Prior promises or understandings not in writing may not be enforceable.",
-            "recommendation": "Ensure all important terms are included in writing."
-        }
-    }
+    RULESET = "advanced"
     
-    def __init__(self):
-        """Initialize risk analyzer"""
+    def __init__(self, rule_engine: RuleEngine = None, clause_extractor: ClauseExtractor = None,
+                 scorer: RiskScorer = None):
+        """
+        Initialize risk analyzer
+        
+        Args:
+            rule_engine: Source of risk rules (defaults to the shared hot-reloaded rulebook)
+            clause_extractor: Classifies sections for rules restricted to clause types
+            scorer: Calibrated scoring model (defaults to saved weights, if any)
+        """
+        self.rule_engine = rule_engine or get_rule_engine()
+        self.clause_extractor = clause_extractor or ClauseExtractor()
+        self.scorer = scorer or RiskScorer.load()
+        # (rulebook, prototype embeddings), recomputed only when a new rulebook is swapped in
+        self._prototypes = (None, None)
         self.semantic_model = None
         try:
             self.semantic_model = SentenceTransformer('all-MiniLM-L6-v2')
         except:
             pass
     
-    def analyze(self, text: str) -> Dict:
+    @property
+    def RISK_PATTERNS(self) -> Dict[str, Dict]:
+        """Risk rules of the currently loaded rulebook"""
+        return self.rule_engine.rulebook.rules(self.RULESET)
+    
+    def analyze(self, text: str, clauses: List[ClauseRecord] = None, page_index: PageIndex = None) -> Dict:
         """
         Comprehensive risk analysis
         
+        Args:
+            clauses: Already extracted clauses of `text`; extracted here when a
+                     section-constrained rule needs them
+            page_index: Page offsets recorded at extraction; rebuilt from
+                        "[Page N]" markers when not given
+        
         Returns:
             Dict with risk_score, risk_level, findings, and recommendations
         """
         findings = []
-        total_score = 0
-        max_score = 100
-        
-        text_lower = text.lower()
-        
-        # Check each risk pattern
-        for risk_type, risk_info in self.RISK_PATTERNS.items():
-            matches = []
-            for keyword in risk_info["keywords"]:
-                if keyword.lower() in text_lower:
-                    # Find context around the keyword
-                    pattern = re.escape(keyword)
-                    for match in re.finditer(pattern, text_lower):
-                        start = max(0, match.start() - 100)
-                        end = min(len(text), match.end() + 100)
-                        context = text[start:end].strip()
-                        matches.append(context)
+        
+        rulebook = self.rule_engine.rulebook
+        use_semantic = self.semantic_model is not None and bool(rulebook.prototypes(self.RULESET))
+        
+        sections = None
+        if clauses is None and (use_semantic or rulebook.needs_sections(self.RULESET)):
+            with timed("clauses"):
+                clauses = self.clause_extractor.extract_clauses(text)
+        if clauses:
+            # With no classified clause at all, section-constrained rules match anywhere
+            sections = [(c.start, c.end, set(c.clause_types)) for c in clauses]
+        
+        # One scan for all rules; metadata comes from the rulebook version that matched
+        rulebook, matches = self.rule_engine.match(self.RULESET, text, sections)
+        # Paraphrases lack the clause-type keywords too, so every section is compared, not just clauses
+        semantic = self._semantic_matches(rulebook, text, self.clause_extractor.partition(text)) \
+            if use_semantic else {}
+        if page_index is None:
+            page_index = PageIndex.from_marked_text(text)
+        
+        for risk_type, risk_info in rulebook.rules(self.RULESET).items():
+            spans = matches.get(risk_type)
+            similarity, section = semantic.get(risk_type, (None, None))
+            if not spans and section is None:
+                continue
+            
+            if spans:
+                detection = "keyword+semantic" if section is not None else "keyword"
+                context = self._context(text, *spans[0])
+                locations = [page_index.locate(start, end) for start, end in spans]
+            else:
+                # Paraphrase without any keyword; scored by its similarity
+                detection = "semantic"
+                context = section.text(text).strip()[:500]
+                locations = [page_index.locate(section.start, section.end)]
             
-            if matches:
-                total_score += risk_info["weight"]
-                findings.append({
-                    "risk_type": risk_type.replace("_", " ").title(),
-                    "severity": risk_info["severity"],
-                    "weight": risk_info["weight"],
-                    "explanation": risk_info["explanation"],
-                    "recommendation": risk_info["recommendation"],
-                    "occurrences": len(matches),
-                    "context": matches[0] if matches else ""
-                })
-        
-        # Calculate normalized risk score (0-10)
-        risk_score = min(10, (total_score / max_score) * 10)
+            findings.append({
+                "rule": risk_type,
+                "risk_type": risk_type.replace("_", " ").title(),
+                "severity": risk_info["severity"],
+                "weight": risk_info["weight"],
+                "explanation": risk_info["explanation"],
+                "recommendation": risk_info["recommendation"],
+                "occurrences": len(spans) if spans else 1,
+                "context": context,
+                "locations": locations,
+                "pages": sorted({loc["page"] for loc in locations if loc["page"] is not None}),
+                "detection": detection,
+                "semantic_similarity": round(similarity, 3) if similarity is not None else None
+            })
+        
+        # Calibrated 0-10 score, normalized for document length and clause count
+        scoring = self.scorer.score(
+            rulebook.rules(self.RULESET), findings, len(text.split()), len(clauses) if clauses else 0
+        )
+        risk_score = scoring["risk_score"]
         
         # Determine risk level
         if risk_score >= 8:
@@ -189,9 +137,71 @@ class AdvancedRiskAnalyzer:
             "total_findings": len(findings),
             "findings": findings,
             "risk_distribution": self._calculate_distribution(findings),
+            "score_explanation": scoring["score_explanation"],
+            "scoring_model": scoring["scoring_model"],
+            "rules_version": rulebook.version,
             "analysis_timestamp": datetime.utcnow().isoformat()
         }
     
+    def _semantic_matches(self, rulebook: CompiledRulebook, text: str,
+                          sections: List[Section]) -> Dict[str, Tuple[float, Section]]:
+        """
+        Best-matching section per risk type by similarity to the rule prototypes
+        
+        All sections are embedded, with their full text up to the model's
+        input limit, in one batched encode call and compared to every
+        prototype with a single matrix product.
+        
+        Returns:
+            Dict mapping rule names to (similarity, section) above the rule threshold
+        """
+        # Characters beyond the model's word-piece limit would only be truncated by the tokenizer
+        max_chars = (getattr(self.semantic_model, "max_seq_length", None) or 256) * 8
+        passages = [(section, section.text(text)[:max_chars].strip()) for section in sections]
+        passages = [(section, passage) for section, passage in passages if passage]
+        if not passages:
+            return {}
+        
+        book, cache = self._prototypes
+        if book is not rulebook:
+            prototypes = rulebook.prototypes(self.RULESET)
+            # Prototypes come grouped by rule; offsets mark where each rule's columns start
+            rule_names, offsets, thresholds = [], [], []
+            for i, (rule_name, _, threshold) in enumerate(prototypes):
+                if not rule_names or rule_names[-1] != rule_name:
+                    rule_names.append(rule_name)
+                    offsets.append(i)
+                    thresholds.append(threshold)
+            cache = {
+                "rule_names": rule_names,
+                "offsets": np.array(offsets),
+                "thresholds": np.array(thresholds),
+                "embeddings": self.semantic_model.encode(
+                    [prototype for _, prototype, _ in prototypes],
+                    convert_to_numpy=True, normalize_embeddings=True
+                )
+            }
+            self._prototypes = (rulebook, cache)
+        
+        embeddings = self.semantic_model.encode(
+            [passage for _, passage in passages], batch_size=64,
+            convert_to_numpy=True, normalize_embeddings=True
+        )
+        # (sections x prototypes) -> best prototype per rule -> best section per rule
+        similarities = np.maximum.reduceat(embeddings @ cache["embeddings"].T, cache["offsets"], axis=1)
+        best_section = similarities.argmax(axis=0)
+        best_similarity = similarities[best_section, np.arange(len(cache["rule_names"]))]
+        
+        return {
+            rule_name: (float(best_similarity[i]), passages[best_section[i]][0])
+            for i, rule_name in enumerate(cache["rule_names"])
+            if best_similarity[i] >= cache["thresholds"][i]
+        }
+    
+    def _context(self, text: str, start: int, end: int, window: int = 100) -> str:
+        """Materialize the context window around a match"""
+        return text[max(0, start - window):min(len(text), end + window)].strip()
+    
     def _calculate_distribution(self, findings: List[Dict]) -> Dict:
         """Calculate distribution of risk severities"""
         distribution = {"Critical": 0, "High": 0, "Medium": 0, "Low": 0}
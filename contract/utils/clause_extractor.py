@@ -1,11 +1,16 @@
 """
 Advanced clause extraction and classification
 """
-import re
-from typing import List, Dict
-import spacy
+from typing import List, Dict, Tuple
+import threading
+import numpy as np
 from collections import defaultdict
 
+from utils.matching import KeywordMatcher
+from utils.patterns import PATTERNS, extract_contract_parties, extract_obligations_for_parties
+from utils.records import ClauseRecord, section_title
+from utils.section_parser import Section, parse_sections, partition_sections
+
 
 class ClauseExtractor:
     """Extract and classify contract clauses"""
@@ -28,169 +33,229 @@ class ClauseExtractor:
         "non_compete": ["non-compete", "non-competition", "restrictive covenant"],
         "data_privacy": ["data", "privacy", "personal information", "gdpr", "ccpa"]
     }
+    CLAUSE_TYPE_NAMES = tuple(CLAUSE_TYPES)
+    
+    # Importance scoring
+    IMPORTANT_TYPES = ["liability", "termination", "payment", "intellectual_property"]
+    HIGH_PRIORITY_WORDS = ["shall", "must", "required", "obligation", "breach"]
+    
+    # spaCy components each NLP feature needs; everything else is disabled per call
+    ENTITY_PIPES = ("tok2vec", "ner")
+    PARTY_LABELS = ("ORG", "PERSON")
     
-    def __init__(self):
-        """Initialize clause extractor"""
-        self.nlp = None
-        try:
-            self.nlp = spacy.load("en_core_web_sm")
-        except:
-            print("Warning: spaCy model not loaded. Some features may be limited.")
+    def __init__(self, semantic_model=None, embedding_threshold: float = 0.45,
+                 spacy_model: str = "en_core_web_sm"):
+        """
+        Initialize clause extractor
+        
+        Args:
+            semantic_model: Optional SentenceTransformer; when given, sections are
+                also classified by embedding similarity in one batched encode call
+            embedding_threshold: Minimum cosine similarity for an embedding match
+            spacy_model: spaCy pipeline loaded on first use of an NLP feature
+                (detect_parties); never loaded otherwise
+        """
+        self.spacy_model = spacy_model
+        self._nlp = None
+        self._nlp_unavailable = False
+        self._nlp_lock = threading.Lock()
+        
+        self.semantic_model = semantic_model
+        self.embedding_threshold = embedding_threshold
+        self._type_embeddings = None
+        
+        # One matcher for every clause keyword plus the importance words
+        type_keywords = [k for keywords in self.CLAUSE_TYPES.values() for k in keywords]
+        self._matcher = KeywordMatcher(type_keywords + self.HIGH_PRIORITY_WORDS)
+        
+        # keywords x types membership and importance weights
+        n_keywords, n_types = len(self._matcher.keywords), len(self.CLAUSE_TYPE_NAMES)
+        self._keyword_types = np.zeros((n_keywords, n_types), dtype=np.int32)
+        for type_id, keywords in enumerate(self.CLAUSE_TYPES.values()):
+            for keyword in keywords:
+                self._keyword_types[self._matcher.index[keyword.lower()], type_id] = 1
+        self._priority_columns = [self._matcher.index[w] for w in self.HIGH_PRIORITY_WORDS]
+        self._type_weights = np.array(
+            [0.3 if name in self.IMPORTANT_TYPES else 0.1 for name in self.CLAUSE_TYPE_NAMES]
+        )
+        self._type_bits = np.left_shift(1, np.arange(n_types, dtype=np.int64))
     
-    def extract_clauses(self, text: str) -> List[Dict]:
+    def extract_clauses(self, text: str) -> List[ClauseRecord]:
         """
         Extract and classify clauses from contract text
         
         Returns:
-            List of clause dictionaries
+            List of ClauseRecord objects (offsets into `text`, dict-style access)
         """
-        clauses = []
+        # Split text into sections, keeping those above the minimum length
+        sections = [
+            (section_num, section)
+            for section_num, section in enumerate(self._split_into_sections(text), 1)
+            if section.kind == "paragraph" or len(section.text(text).strip()) > 50
+        ]
+        if not sections:
+            return []
         
-        # Split text into sections
-        sections = self._split_into_sections(text)
+        # Classify all sections at once
+        type_masks, importance = self._classify_sections(text, [s for _, s in sections])
         
-        for section_num, section_text in enumerate(sections, 1):
-            # Classify the section
-            clause_types = self._classify_section(section_text)
-            
-            if clause_types:
-                # Extract title
-                title = self._extract_section_title(section_text)
-                
-                clause = {
-                    "section_number": section_num,
-                    "title": title,
-                    "content": section_text.strip()[:500],  # First 500 chars
-                    "full_content": section_text.strip(),
-                    "clause_types": clause_types,
-                    "word_count": len(section_text.split()),
-                    "importance": self._calculate_importance(section_text, clause_types)
-                }
-                
-                clauses.append(clause)
+        clauses = []
+        for (section_num, section), type_mask, score in zip(sections, type_masks, importance):
+            if type_mask:
+                clauses.append(ClauseRecord(
+                    doc=text,
+                    type_names=self.CLAUSE_TYPE_NAMES,
+                    section_number=section_num,
+                    label=section.label,
+                    level=section.level,
+                    start=section.start,
+                    end=section.end,
+                    body_start=section.body_start,
+                    type_mask=int(type_mask),
+                    importance=float(score)
+                ))
         
         return clauses
     
-    def _split_into_sections(self, text: str) -> List[str]:
+    def extract_sections(self, text: str) -> List[Section]:
+        """Split contract text into a section tree (offsets into `text`) without classifying"""
+        return self._split_into_sections(text)
+    
+    def partition(self, text: str) -> List[Section]:
+        """Sections covering all of the text: preamble, then every section, short ones included"""
+        return partition_sections(text)
+    
+    def _split_into_sections(self, text: str) -> List[Section]:
         """Split contract into logical sections"""
-        # Try to split by numbered sections first
-        pattern = r'\n\s*(\d+\.|\d+\)|\([a-z]\)|\([ivxl]+\))\s+'
-        sections = re.split(pattern, text)
-        
-        # Combine section markers with their content
-        combined = []
-        for i in range(1, len(sections), 2):
-            if i < len(sections):
-                section = (sections[i-1] if i > 0 else "") + sections[i]
-                if len(section.strip()) > 50:  # Minimum section length
-                    combined.append(section)
-        
-        # If no clear sections, split by paragraphs
-        if len(combined) < 3:
-            combined = [p for p in text.split('\n\n') if len(p.strip()) > 100]
-        
-        return combined[:50]  # Limit to 50 sections
-    
-    def _classify_section(self, text: str) -> List[str]:
-        """Classify section into clause types"""
-        text_lower = text.lower()
-        detected_types = []
-        
-        for clause_type, keywords in self.CLAUSE_TYPES.items():
-            for keyword in keywords:
-                if keyword.lower() in text_lower:
-                    detected_types.append(clause_type)
-                    break
+        return parse_sections(text)
+    
+    def _classify_sections(self, text: str, sections: List[Section]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Classify sections into clause types and score their importance
+        
+        Builds a sections x keywords hit matrix from one scan of the document
+        and derives both clause types and importance from it.
+        
+        Returns:
+            (type bitmasks over CLAUSE_TYPE_NAMES, importance scores)
+        """
+        starts = np.array([s.start for s in sections], dtype=np.int64)
+        ends = np.array([s.end for s in sections], dtype=np.int64)
+        hits = (self._matcher.hit_matrix(text, starts, ends) > 0).astype(np.int32)
+        
+        type_hits = (hits @ self._keyword_types) > 0
+        if self.semantic_model:
+            type_hits |= self._embedding_type_hits([s.text(text) for s in sections])
         
-        return detected_types
+        # Base score on clause types, boost for high-priority words
+        importance = type_hits @ self._type_weights + 0.05 * hits[:, self._priority_columns].sum(axis=1)
+        importance = np.minimum(1.0, importance)
+        
+        type_masks = type_hits @ self._type_bits
+        return type_masks, importance
+    
+    def _embedding_type_hits(self, section_texts: List[str]) -> np.ndarray:
+        """Clause types whose description is semantically close to each section"""
+        if self._type_embeddings is None:
+            descriptions = [
+                f"{name.replace('_', ' ')} clause: {', '.join(keywords)}"
+                for name, keywords in self.CLAUSE_TYPES.items()
+            ]
+            self._type_embeddings = self.semantic_model.encode(
+                descriptions, convert_to_numpy=True, normalize_embeddings=True
+            )
+        
+        embeddings = self.semantic_model.encode(
+            section_texts, batch_size=64, convert_to_numpy=True, normalize_embeddings=True
+        )
+        return (embeddings @ self._type_embeddings.T) >= self.embedding_threshold
+    
+    @property
+    def nlp(self):
+        """spaCy pipeline, loaded on first access (None if unavailable)"""
+        if self._nlp is None and not self._nlp_unavailable:
+            with self._nlp_lock:
+                if self._nlp is None and not self._nlp_unavailable:
+                    try:
+                        import spacy
+                        self._nlp = spacy.load(self.spacy_model, exclude=["lemmatizer"])
+                    except Exception:
+                        self._nlp_unavailable = True
+                        print("Warning: spaCy model not loaded. Some features may be limited.")
+        return self._nlp
+    
+    def _pipe(self, texts: List[str], components: Tuple[str, ...], batch_size: int):
+        """Run texts through spaCy with only the given components enabled"""
+        disable = [name for name in self.nlp.pipe_names if name not in components]
+        return self.nlp.pipe(texts, disable=disable, batch_size=batch_size)
+    
+    def detect_parties(self, text: str, max_parties: int = 5, preamble_chars: int = 5000,
+                       batch_size: int = 16) -> List[str]:
+        """
+        Detect contracting parties from named entities in the preamble
+        
+        Returns:
+            Organization/person names ordered by mention count
+        """
+        if self.nlp is None:
+            return []
+        
+        paragraphs = [p for p in PATTERNS["paragraph_break"].split(text[:preamble_chars]) if p.strip()]
+        counts = defaultdict(int)
+        for doc in self._pipe(paragraphs, self.ENTITY_PIPES, batch_size):
+            for ent in doc.ents:
+                if ent.label_ in self.PARTY_LABELS:
+                    counts[ent.text.strip()] += 1
+        
+        return sorted(counts, key=counts.get, reverse=True)[:max_parties]
     
     def _extract_section_title(self, text: str) -> str:
         """Extract title from section"""
-        # Look for title in first line or first sentence
-        lines = text.strip().split('\n')
-        first_line = lines[0] if lines else ""
-        
-        # If first line is short and in title case or all caps, use it
-        if len(first_line.split()) <= 10:
-            if first_line.isupper() or first_line.istitle():
-                return first_line.strip()
-        
-        # Otherwise, use first sentence
-        sentences = re.split(r'[.!?]\s+', text)
-        if sentences:
-            title = sentences[0][:100]  # Max 100 chars
-            return title.strip()
-        
-        return "Untitled Clause"
-    
-    def _calculate_importance(self, text: str, clause_types: List[str]) -> float:
-        """Calculate importance score for clause"""
-        score = 0.0
-        
-        # Base score on clause types
-        important_types = ["liability", "termination", "payment", "intellectual_property"]
-        for ct in clause_types:
-            if ct in important_types:
-                score += 0.3
-            else:
-                score += 0.1
-        
-        # Boost for certain keywords
-        high_priority = ["shall", "must", "required", "obligation", "breach"]
-        text_lower = text.lower()
-        score += sum(0.05 for word in high_priority if word in text_lower)
-        
-        return min(1.0, score)
+        return section_title(text)
     
     def extract_key_terms(self, text: str) -> Dict:
         """Extract key terms and definitions"""
         terms = {}
         
-        # Pattern for defined terms: "Term" means...
-        pattern1 = r'"([^"]+)"\s+(?:means?|refers? to|is defined as)\s+([^.]+\.)'
-        matches = re.finditer(pattern1, text, re.IGNORECASE)
-        for match in matches:
+        # Defined terms: "Term" means...
+        for match in PATTERNS["defined_term"].finditer(text):
             term = match.group(1).strip()
             definition = match.group(2).strip()
             terms[term] = definition
         
-        # Pattern for definitions section
-        if "definitions" in text.lower():
-            # Extract section containing definitions
-            pattern2 = r'definitions.*?(?=\n\s*\d+\.|\Z)'
-            match = re.search(pattern2, text, re.IGNORECASE | re.DOTALL)
-            if match:
-                def_section = match.group(0)
-                # Extract individual terms
-                term_pattern = r'([A-Z][a-zA-Z\s]+):\s+([^;]+);'
-                for m in re.finditer(term_pattern, def_section):
-                    terms[m.group(1).strip()] = m.group(2).strip()
+        # Definitions section
+        match = PATTERNS["definitions_section"].search(text)
+        if match:
+            # Extract individual terms
+            for m in PATTERNS["definition_entry"].finditer(match.group(0)):
+                terms[m.group(1).strip()] = m.group(2).strip()
         
         return terms
     
-    def extract_obligations(self, text: str, party: str = "Contractor") -> List[Dict]:
-        """Extract obligations for a specific party"""
-        obligations = []
-        
-        # Patterns for obligations
-        patterns = [
-            rf'{party}\s+(?:shall|must|will|agrees to)\s+([^.]+\.)',
-            rf'(?:The\s+)?{party}\s+is\s+(?:required|obligated)\s+to\s+([^.]+\.)',
-        ]
+    def extract_parties(self, text: str, max_parties: int = 5) -> List[str]:
+        """Party names from contract wording, falling back to spaCy entities"""
+        return extract_contract_parties(text, max_parties) or self.detect_parties(text, max_parties)
+    
+    def extract_all_obligations(self, text: str, parties: List[str] = None,
+                                limit_per_party: int = 20) -> Dict[str, List[Dict]]:
+        """
+        Extract obligations for every party in a single pass
         
-        for pattern in patterns:
-            matches = re.finditer(pattern, text, re.IGNORECASE)
-            for match in matches:
-                obligation_text = match.group(1).strip()
-                obligations.append({
-                    "party": party,
-                    "obligation": obligation_text,
-                    "context": match.group(0)
-                })
+        Args:
+            parties: Party names; detected from the contract when omitted
         
-        return obligations[:20]  # Limit to top 20
+        Returns:
+            Dict mapping party name to its obligations
+        """
+        if parties is None:
+            parties = self.extract_parties(text)
+        return extract_obligations_for_parties(text, parties, limit_per_party)
+    
+    def extract_obligations(self, text: str, party: str = "Contractor") -> List[Dict]:
+        """Extract obligations for a specific party"""
+        return self.extract_all_obligations(text, [party]).get(party, [])
     
-    def summarize_clauses(self, clauses: List[Dict]) -> Dict:
+    def summarize_clauses(self, clauses: List[ClauseRecord]) -> Dict:
         """Generate summary statistics for clauses"""
         summary = {
             "total_clauses": len(clauses),
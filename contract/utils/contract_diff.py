@@ -0,0 +1,313 @@
+"""
+Clause-aligned redline diff between two contracts
+"""
+import re
+import html
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from utils.clause_extractor import ClauseExtractor
+from utils.page_index import PAGE_MARKER
+from utils.records import section_title
+
+
+WORD_PATTERN = re.compile(r'\S+')
+
+
+def _middle_snake(a: Sequence, b: Sequence, a_lo: int, a_hi: int,
+                  b_lo: int, b_hi: int) -> Optional[Tuple[int, int, int, int]]:
+    """Find the middle snake of a[a_lo:a_hi] vs b[b_lo:b_hi] (Myers 1986, section 4b)"""
+    n = a_hi - a_lo
+    m = b_hi - b_lo
+    delta = n - m
+    odd = delta & 1
+    max_d = (n + m + 1) // 2
+    offset = max_d + 1
+    forward = [0] * (2 * offset + 1)
+    backward = [0] * (2 * offset + 1)
+
+    for d in range(max_d + 1):
+        # Forward search: furthest reaching x on each diagonal k = x - y
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and forward[offset + k - 1] < forward[offset + k + 1]):
+                x = forward[offset + k + 1]
+            else:
+                x = forward[offset + k - 1] + 1
+            y = x - k
+            x_start, y_start = x, y
+            while x < n and y < m and a[a_lo + x] == b[b_lo + y]:
+                x += 1
+                y += 1
+            forward[offset + k] = x
+
+            reverse_k = delta - k
+            if odd and -(d - 1) <= reverse_k <= d - 1:
+                if x + backward[offset + reverse_k] >= n:
+                    return x_start, y_start, x, y
+
+        # Backward search on the reversed sequences
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and backward[offset + k - 1] < backward[offset + k + 1]):
+                x = backward[offset + k + 1]
+            else:
+                x = backward[offset + k - 1] + 1
+            y = x - k
+            x_end, y_end = x, y
+            while x < n and y < m and a[a_hi - 1 - x] == b[b_hi - 1 - y]:
+                x += 1
+                y += 1
+            backward[offset + k] = x
+
+            forward_k = delta - k
+            if not odd and -d <= forward_k <= d:
+                if x + forward[offset + forward_k] >= n:
+                    return n - x, m - y, n - x_end, m - y_end
+
+    # Unreachable for well-formed input
+    return None
+
+
+def diff_sequences(a: Sequence, b: Sequence) -> List[Tuple[str, int, int, int, int]]:
+    """
+    Diff two sequences with Myers' linear-space O(ND) algorithm
+
+    Returns:
+        difflib-style opcodes: (tag, a_start, a_end, b_start, b_end)
+    """
+    matches = []
+    stack = [(0, len(a), 0, len(b))]
+
+    while stack:
+        a_lo, a_hi, b_lo, b_hi = stack.pop()
+
+        # Strip common prefix and suffix
+        start_a, start_b = a_lo, b_lo
+        while a_lo < a_hi and b_lo < b_hi and a[a_lo] == b[b_lo]:
+            a_lo += 1
+            b_lo += 1
+        if a_lo > start_a:
+            matches.append((start_a, start_b, a_lo - start_a))
+
+        end_a, end_b = a_hi, b_hi
+        while a_hi > a_lo and b_hi > b_lo and a[a_hi - 1] == b[b_hi - 1]:
+            a_hi -= 1
+            b_hi -= 1
+        if a_hi < end_a:
+            matches.append((a_hi, b_hi, end_a - a_hi))
+
+        if a_lo == a_hi or b_lo == b_hi:
+            continue
+
+        snake = _middle_snake(a, b, a_lo, a_hi, b_lo, b_hi)
+        if snake is None:
+            continue
+        x, y, u, v = snake
+        if u > x:
+            matches.append((a_lo + x, b_lo + y, u - x))
+        stack.append((a_lo + u, a_hi, b_lo + v, b_hi))
+        stack.append((a_lo, a_lo + x, b_lo, b_lo + y))
+
+    matches.sort()
+
+    opcodes = []
+    i = j = 0
+    for a_pos, b_pos, size in matches + [(len(a), len(b), 0)]:
+        if i < a_pos and j < b_pos:
+            opcodes.append(("replace", i, a_pos, j, b_pos))
+        elif i < a_pos:
+            opcodes.append(("delete", i, a_pos, j, b_pos))
+        elif j < b_pos:
+            opcodes.append(("insert", i, a_pos, j, b_pos))
+        if size:
+            if opcodes and opcodes[-1][0] == "equal":
+                _, a_start, _, b_start, _ = opcodes.pop()
+            else:
+                a_start, b_start = a_pos, b_pos
+            opcodes.append(("equal", a_start, a_pos + size, b_start, b_pos + size))
+        i, j = a_pos + size, b_pos + size
+
+    return opcodes
+
+
+class ContractDiffer:
+    """Align two contracts clause by clause and redline the matched pairs"""
+
+    def __init__(self, clause_extractor: ClauseExtractor = None, semantic_model=None,
+                 match_threshold: float = 0.5):
+        """
+        Initialize differ
+
+        Args:
+            clause_extractor: Extractor used to split contracts into sections
+            semantic_model: Optional SentenceTransformer for section matching
+            match_threshold: Minimum similarity for two sections to be paired
+        """
+        self.clause_extractor = clause_extractor or ClauseExtractor()
+        self.semantic_model = semantic_model
+        self.match_threshold = match_threshold
+
+    def diff(self, original: str, revised: str) -> Dict:
+        """
+        Produce a clause-aligned redline of `revised` against `original`
+
+        Returns:
+            Dict with per-section changes and summary statistics
+        """
+        spans_a, sections_a = self._sections(original)
+        spans_b, sections_b = self._sections(revised)
+
+        pairs = self._align(sections_a, sections_b)
+
+        results = []
+        stats = {"unchanged": 0, "modified": 0, "added": 0, "removed": 0,
+                 "words_inserted": 0, "words_deleted": 0}
+
+        for a_idx, b_idx, similarity in pairs:
+            if a_idx is None:
+                words = WORD_PATTERN.findall(sections_b[b_idx])
+                status = "added"
+                changes = [{"op": "insert", "text": " ".join(words)}]
+                stats["words_inserted"] += len(words)
+            elif b_idx is None:
+                words = WORD_PATTERN.findall(sections_a[a_idx])
+                status = "removed"
+                changes = [{"op": "delete", "text": " ".join(words)}]
+                stats["words_deleted"] += len(words)
+            else:
+                changes, inserted, deleted = self._word_diff(sections_a[a_idx], sections_b[b_idx])
+                status = "modified" if inserted or deleted else "unchanged"
+                stats["words_inserted"] += inserted
+                stats["words_deleted"] += deleted
+
+            stats[status] += 1
+            if b_idx is not None:
+                section, doc = spans_b[b_idx], revised
+            else:
+                section, doc = spans_a[a_idx], original
+            results.append({
+                "status": status,
+                "original_section": a_idx + 1 if a_idx is not None else None,
+                "revised_section": b_idx + 1 if b_idx is not None else None,
+                "label": section.label,
+                "title": section_title(doc[section.body_start:section.end]),
+                "similarity": round(similarity, 3),
+                "changes": changes
+            })
+
+        return {"sections": results, "stats": stats}
+
+    def _sections(self, text: str) -> Tuple[List, List[str]]:
+        """
+        Partition spans of `text` and their text without "[Page N]" markers
+
+        Full partitions, so text before the first heading and short paragraphs are
+        diffed too. Pagination is not a change: spans holding only a marker are dropped.
+        """
+        spans, sections = [], []
+        for span in self.clause_extractor.partition(text):
+            section = PAGE_MARKER.sub("", span.text(text))
+            if section.strip():
+                spans.append(span)
+                sections.append(section)
+        return spans, sections
+
+    def _align(self, sections_a: List[str], sections_b: List[str]) -> List[Tuple[Optional[int], Optional[int], float]]:
+        """Pair sections: exact matches via sequence diff, then similarity within changed blocks"""
+        keys_a = [self._normalize(s) for s in sections_a]
+        keys_b = [self._normalize(s) for s in sections_b]
+
+        pairs = []
+        for tag, a_start, a_end, b_start, b_end in diff_sequences(keys_a, keys_b):
+            if tag == "equal":
+                pairs.extend((i, j, 1.0) for i, j in zip(range(a_start, a_end), range(b_start, b_end)))
+            else:
+                pairs.extend(self._match_block(sections_a, sections_b,
+                                               range(a_start, a_end), range(b_start, b_end)))
+        return pairs
+
+    def _match_block(self, sections_a: List[str], sections_b: List[str],
+                     block_a: range, block_b: range) -> List[Tuple[Optional[int], Optional[int], float]]:
+        """Greedily pair the most similar sections of a changed block"""
+        similarity = self._similarity_matrix([sections_a[i] for i in block_a],
+                                             [sections_b[j] for j in block_b])
+
+        candidates = sorted(
+            ((similarity[i][j], i, j) for i in range(len(block_a)) for j in range(len(block_b))
+             if similarity[i][j] >= self.match_threshold),
+            reverse=True
+        )
+        matched_a, matched_b = {}, {}
+        for score, i, j in candidates:
+            if i not in matched_a and j not in matched_b:
+                matched_a[i] = (j, score)
+                matched_b[j] = i
+
+        # Emit in revised order, placing removed sections before the next kept one
+        pairs = []
+        pending_removed = [i for i in range(len(block_a)) if i not in matched_a]
+        for j in range(len(block_b)):
+            if j in matched_b:
+                i = matched_b[j]
+                while pending_removed and pending_removed[0] < i:
+                    pairs.append((block_a[pending_removed.pop(0)], None, 0.0))
+                pairs.append((block_a[i], block_b[j], float(matched_a[i][1])))
+            else:
+                pairs.append((None, block_b[j], 0.0))
+        pairs.extend((block_a[i], None, 0.0) for i in pending_removed)
+        return pairs
+
+    def _similarity_matrix(self, texts_a: List[str], texts_b: List[str]) -> List[List[float]]:
+        """Section similarity via embeddings when available, otherwise word overlap"""
+        if not texts_a or not texts_b:
+            return [[0.0] * len(texts_b) for _ in texts_a]
+
+        if self.semantic_model:
+            from sentence_transformers import util
+            embeddings = self.semantic_model.encode(texts_a + texts_b, convert_to_tensor=True)
+            scores = util.cos_sim(embeddings[:len(texts_a)], embeddings[len(texts_a):])
+            return scores.tolist()
+
+        words_a = [set(WORD_PATTERN.findall(t.lower())) for t in texts_a]
+        words_b = [set(WORD_PATTERN.findall(t.lower())) for t in texts_b]
+        return [
+            [len(wa & wb) / len(wa | wb) if wa or wb else 1.0 for wb in words_b]
+            for wa in words_a
+        ]
+
+    def _word_diff(self, text_a: str, text_b: str) -> Tuple[List[Dict], int, int]:
+        """Word-level diff of a matched section pair"""
+        words_a = WORD_PATTERN.findall(text_a)
+        words_b = WORD_PATTERN.findall(text_b)
+
+        changes = []
+        inserted = deleted = 0
+        for tag, a_start, a_end, b_start, b_end in diff_sequences(words_a, words_b):
+            if tag == "equal":
+                changes.append({"op": "equal", "text": " ".join(words_a[a_start:a_end])})
+                continue
+            if tag in ("delete", "replace"):
+                changes.append({"op": "delete", "text": " ".join(words_a[a_start:a_end])})
+                deleted += a_end - a_start
+            if tag in ("insert", "replace"):
+                changes.append({"op": "insert", "text": " ".join(words_b[b_start:b_end])})
+                inserted += b_end - b_start
+
+        return changes, inserted, deleted
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        """Whitespace- and case-insensitive key for exact section matching"""
+        return " ".join(text.lower().split())
+
+    @staticmethod
+    def render_redline_html(changes: List[Dict]) -> str:
+        """Render a section's changes as HTML with <del>/<ins> markup"""
+        parts = []
+        for change in changes:
+            text = html.escape(change["text"])
+            if change["op"] == "delete":
+                parts.append(f'<del style="color:#d32f2f">{text}</del>')
+            elif change["op"] == "insert":
+                parts.append(f'<ins style="color:#388e3c">{text}</ins>')
+            else:
+                parts.append(text)
+        return " ".join(parts)
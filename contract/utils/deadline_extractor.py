@@ -0,0 +1,297 @@
+"""
+Date, duration and deadline extraction for obligation timelines
+"""
+import re
+import calendar
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+
+NUMBER_WORDS = {
+    "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7,
+    "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12, "thirteen": 13,
+    "fourteen": 14, "fifteen": 15, "sixteen": 16, "seventeen": 17, "eighteen": 18,
+    "nineteen": 19, "twenty": 20, "thirty": 30, "forty": 40,
+    "fifty": 50, "sixty": 60, "seventy": 70, "eighty": 80, "ninety": 90,
+    "one hundred": 100, "one hundred twenty": 120, "one hundred eighty": 180,
+}
+# Compounds: "twenty-one", "forty five", ...
+NUMBER_WORDS.update({
+    f"{tens}-{unit}": NUMBER_WORDS[tens] + NUMBER_WORDS[unit]
+    for tens in ("twenty", "thirty", "forty", "fifty", "sixty", "seventy", "eighty", "ninety")
+    for unit in ("one", "two", "three", "four", "five", "six", "seven", "eight", "nine")
+})
+
+MONTHS = {name.lower(): i for i, name in enumerate(calendar.month_name) if name}
+MONTHS.update({name.lower(): i for i, name in enumerate(calendar.month_abbr) if name})
+
+_NUMBER_WORD_ALT = "|".join(
+    r"[-\s]+".join(re.escape(part) for part in re.split(r"[-\s]", word))
+    for word in sorted(NUMBER_WORDS, key=len, reverse=True)
+)
+_MONTH_ALT = "|".join(sorted(MONTHS, key=len, reverse=True))
+
+# "thirty (30) days", "30 days", "sixty calendar days", "ten (10) business days", "one (1) year"
+DURATION_PATTERN = re.compile(
+    rf'(?<![-\w])(?:(?P<word>{_NUMBER_WORD_ALT})\s*(?:\(\s*(?P<paren>\d{{1,4}})\s*\))?|(?P<digits>\d{{1,4}}))'
+    r'\s+(?:(?P<qualifier>calendar|business|working)\s+)?(?P<unit>day|week|month|year)s?\b',
+    re.IGNORECASE
+)
+
+# "January 1, 2025", "1 January 2025", "01/31/2025", "2025-01-31"
+DATE_PATTERN = re.compile(
+    rf'\b(?:(?P<month>{_MONTH_ALT})\.?\s+(?P<day>\d{{1,2}})(?:st|nd|rd|th)?,?\s+(?P<year>\d{{4}})'
+    rf'|(?P<day2>\d{{1,2}})(?:st|nd|rd|th)?\s+(?:day\s+of\s+)?(?P<month2>{_MONTH_ALT}),?\s+(?P<year2>\d{{4}})'
+    r'|(?P<us_month>\d{1,2})/(?P<us_day>\d{1,2})/(?P<us_year>\d{4})'
+    r'|(?P<iso_year>\d{4})-(?P<iso_month>\d{2})-(?P<iso_day>\d{2}))\b',
+    re.IGNORECASE
+)
+
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.;!?])\s+|\n\s*\n')
+BEFORE_CUE = re.compile(r'\b(?:prior to|before|in advance of|preceding)\b')
+OBLIGATION_CUE = re.compile(r'\b(?:shall|must|agrees to|is required to)\b')
+# "a term of", "continue for", "remain in (full force and) effect for (a period of)" right before a duration
+TERM_CUE = re.compile(
+    r'\b(?:(?:term|period)\s+of|(?:continue|remain\s+in\s+(?:full\s+force\s+and\s+)?effect)\s+for'
+    r'(?:\s+a\s+period\s+of)?)\s+$'
+)
+DEADLINE_CUE = re.compile(r'\b(?:by|on or before|no later than|before)\b')
+
+# Keyword cues (checked in order) that decide what a duration is about
+KIND_CUES = [
+    ("renewal", ("renew",)),
+    ("cure_period", ("cure", "remedy")),
+    ("payment", ("invoice", "payment", "pay ", "payable")),
+    ("termination", ("terminat",)),
+    ("notice_period", ("notice", "notify", "notification")),
+    ("term", ("term of", "initial term", "period of")),
+]
+
+ANCHOR_CUES = [
+    ("expiration", ("expiration", "expiry", "end of the term", "end of the then-current term", "renewal date")),
+    ("effective_date", ("effective date", "date of this agreement", "execution")),
+    ("invoice", ("invoice",)),
+    ("termination", ("termination",)),
+    ("notice", ("notice", "notification")),
+]
+
+
+class DeadlineExtractor:
+    """Extract durations, dates and notice/renewal deadlines as structured records"""
+
+    def extract(self, text: str, reference_date: date = None) -> Dict:
+        """
+        Extract the contract timeline
+
+        Args:
+            reference_date: Date used as effective date when the contract has none
+
+        Returns:
+            Dict with effective_date, expiration_date and a list of deadline records
+        """
+        sentences = self._sentence_spans(text)
+        dates = [(m.start(), m.end(), self._parse_date(m)) for m in DATE_PATTERN.finditer(text)]
+        dates = [d for d in dates if d[2]]
+
+        effective_date = self._find_anchor_date(text, sentences, dates,
+                                                ("effective", "commence", "dated as of", "valid from",
+                                                 "as of", "entered into"))
+        expiration_date = self._find_anchor_date(text, sentences, dates, ("expire", "expiration", "until"))
+
+        records = []
+        for match in DURATION_PATTERN.finditer(text):
+            value, unit, business = self._parse_duration(match)
+            if value is None:
+                continue
+
+            sent_start, sent_end = self._enclosing(sentences, match.start())
+            sentence = text[sent_start:sent_end]
+            lowered = sentence.lower()
+
+            # "an initial term of one (1) year" / "continue for twelve (12) months" names the
+            # term even in a renewal sentence
+            preceding = text[max(sent_start, match.start() - 60):match.start()].lower()
+            following = text[match.end():min(sent_end, match.end() + 60)].lower()
+            if TERM_CUE.search(preceding):
+                kind = "term"
+                # A term's own anchor follows it: "five (5) years after termination" is a
+                # survival period, not the agreement's term
+                anchor = self._first_cue(following, ANCHOR_CUES)
+            else:
+                kind = self._first_cue(lowered, KIND_CUES) or "other"
+                anchor = self._first_cue(lowered, ANCHOR_CUES)
+            # "... days prior to expiration": the cue has to follow the duration closely
+            direction = "before" if BEFORE_CUE.search(following[:40]) else "after"
+
+            records.append({
+                "kind": kind,
+                "duration_value": value,
+                "duration_unit": unit,
+                "business_days": business,
+                "duration_days": self._approx_days(value, unit, business),
+                "direction": direction,
+                "anchor": anchor,
+                "description": " ".join(sentence.split())[:500],
+                "start": match.start(),
+                "end": match.end(),
+                "due_date": None,
+            })
+
+        # Term length gives the expiration date when it is not stated explicitly; only a
+        # term running from the start counts (not "... years after termination")
+        start_date = effective_date or reference_date
+        if not expiration_date and start_date:
+            for record in records:
+                if record["kind"] == "term" and record["anchor"] in (None, "effective_date"):
+                    expiration_date = self._shift(start_date, record["duration_value"],
+                                                  record["duration_unit"], record["business_days"])
+                    break
+
+        for record in records:
+            record["due_date"] = self._resolve_due_date(record, start_date, expiration_date)
+
+        # Explicitly dated obligations ("shall deliver ... by March 1, 2025")
+        for start, end, value in dates:
+            sent_start, sent_end = self._enclosing(sentences, start)
+            lowered = text[sent_start:sent_end].lower()
+            if OBLIGATION_CUE.search(lowered) and DEADLINE_CUE.search(lowered):
+                records.append({
+                    "kind": self._first_cue(lowered, KIND_CUES) or "dated_obligation",
+                    "duration_value": None,
+                    "duration_unit": None,
+                    "business_days": False,
+                    "duration_days": None,
+                    "direction": None,
+                    "anchor": None,
+                    "description": " ".join(text[sent_start:sent_end].split())[:500],
+                    "start": start,
+                    "end": end,
+                    "due_date": value,
+                })
+
+        records.sort(key=lambda r: r["start"])
+        return {
+            "effective_date": effective_date,
+            "expiration_date": expiration_date,
+            "deadlines": records,
+        }
+
+    def _resolve_due_date(self, record: Dict, start_date: Optional[date],
+                          expiration_date: Optional[date]) -> Optional[date]:
+        """Absolute due date when the duration hangs off a known date"""
+        value, unit, business = record["duration_value"], record["duration_unit"], record["business_days"]
+        if record["direction"] == "before":
+            # Notice ahead of expiration / renewal
+            if expiration_date and (record["anchor"] == "expiration" or record["kind"] == "renewal"):
+                return self._shift(expiration_date, -value, unit, business)
+        elif record["anchor"] == "effective_date" and start_date and record["kind"] != "term":
+            return self._shift(start_date, value, unit, business)
+        return None
+
+    def _parse_duration(self, match: re.Match) -> Tuple[Optional[int], str, bool]:
+        """Numeric value, unit and business-day flag of a duration match"""
+        if match.group("paren"):
+            value = int(match.group("paren"))
+        elif match.group("digits"):
+            value = int(match.group("digits"))
+        else:
+            words = match.group("word").lower().split()
+            value = NUMBER_WORDS.get(" ".join(words)) or NUMBER_WORDS.get("-".join(words))
+        unit = match.group("unit").lower()
+        qualifier = (match.group("qualifier") or "").lower()
+        return value, unit, qualifier in ("business", "working")
+
+    def _parse_date(self, match: re.Match) -> Optional[date]:
+        """Convert a date match into a date (None if invalid)"""
+        groups = match.groupdict()
+        try:
+            if groups["month"]:
+                return date(int(groups["year"]), MONTHS[groups["month"].lower()], int(groups["day"]))
+            if groups["month2"]:
+                return date(int(groups["year2"]), MONTHS[groups["month2"].lower()], int(groups["day2"]))
+            if groups["us_month"]:
+                return date(int(groups["us_year"]), int(groups["us_month"]), int(groups["us_day"]))
+            return date(int(groups["iso_year"]), int(groups["iso_month"]), int(groups["iso_day"]))
+        except ValueError:
+            return None
+
+    def _find_anchor_date(self, text: str, sentences: List[Tuple[int, int]],
+                          dates: List[Tuple[int, int, date]], cues: Tuple[str, ...]) -> Optional[date]:
+        """
+        First date that follows one of `cues` in its sentence
+
+        "valid from April 1, 2024 until March 31, 2025" gives March 31 for
+        "until". When no date follows a cue, the first date of a sentence
+        mentioning one is used ("on March 31, 2025 this Agreement expires").
+        """
+        fallback = None
+        for start, _, value in dates:
+            sent_start, sent_end = self._enclosing(sentences, start)
+            lowered = text[sent_start:sent_end].lower()
+            positions = [lowered.find(cue) for cue in cues if cue in lowered]
+            if not positions:
+                continue
+            if min(positions) < start - sent_start:
+                return value
+            if fallback is None:
+                fallback = value
+        return fallback
+
+    @staticmethod
+    def _sentence_spans(text: str) -> List[Tuple[int, int]]:
+        """(start, end) offsets of sentences"""
+        spans = []
+        start = 0
+        for match in SENTENCE_BOUNDARY.finditer(text):
+            spans.append((start, match.start()))
+            start = match.end()
+        spans.append((start, len(text)))
+        return spans
+
+    @staticmethod
+    def _enclosing(spans: List[Tuple[int, int]], offset: int) -> Tuple[int, int]:
+        """Sentence span containing `offset` (binary search)"""
+        lo, hi = 0, len(spans) - 1
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if spans[mid][0] <= offset:
+                lo = mid
+            else:
+                hi = mid - 1
+        return spans[lo]
+
+    @staticmethod
+    def _first_cue(lowered: str, cues: List[Tuple[str, Tuple[str, ...]]]) -> Optional[str]:
+        for name, words in cues:
+            if any(word in lowered for word in words):
+                return name
+        return None
+
+    @staticmethod
+    def _approx_days(value: int, unit: str, business: bool) -> int:
+        """Duration in calendar days (months as 30, years as 365)"""
+        if unit == "day":
+            return -(-value * 7 // 5) if business else value
+        return value * {"week": 7, "month": 30, "year": 365}[unit]
+
+    @staticmethod
+    def _shift(start: date, value: int, unit: str, business: bool = False) -> date:
+        """Calendar arithmetic: add (or subtract) a duration to a date"""
+        if unit == "day":
+            if not business:
+                return start + timedelta(days=value)
+            step = 1 if value >= 0 else -1
+            current, remaining = start, abs(value)
+            while remaining:
+                current += timedelta(days=step)
+                if current.weekday() < 5:
+                    remaining -= 1
+            return current
+        if unit == "week":
+            return start + timedelta(weeks=value)
+
+        months = value * (12 if unit == "year" else 1)
+        month_index = start.month - 1 + months
+        year, month = start.year + month_index // 12, month_index % 12 + 1
+        day = min(start.day, calendar.monthrange(year, month)[1])
+        return date(year, month, day)
@@ -0,0 +1,106 @@
+"""
+Multi-keyword matching compiled into a single regex pass
+"""
+import re
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
+
+import numpy as np
+
+
+def build_trie_pattern(words: Iterable[str]) -> str:
+    """
+    Build a regex alternation factored by common prefixes
+
+    A trie-shaped pattern lets the regex engine reject a position after one
+    character comparison instead of trying every keyword in turn, and greedy
+    optional groups make the longest keyword win at each position.
+    """
+    trie: Dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = True
+
+    def _render(node: Dict) -> str:
+        terminal = "" in node
+        branches = [re.escape(char) + _render(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if terminal:
+            return "(?:" + body + ")?"
+        return body
+
+    return _render(trie)
+
+
+class KeywordMatcher:
+    """Find every occurrence of many keywords (case-insensitive substrings) in one scan"""
+
+    def __init__(self, keywords: Sequence[str]):
+        """
+        Compile keywords into one matcher
+
+        Args:
+            keywords: Keywords to find; duplicates share one column index
+        """
+        self.keywords: List[str] = []
+        self.index: Dict[str, int] = {}
+        for keyword in keywords:
+            keyword = keyword.lower()
+            if keyword not in self.index:
+                self.index[keyword] = len(self.keywords)
+                self.keywords.append(keyword)
+
+        self.lengths = np.array([len(k) for k in self.keywords], dtype=np.int64)
+        # Zero-width lookahead reports a match at every start position, including overlaps
+        self._pattern = re.compile(
+            "(?=(" + build_trie_pattern(self.keywords) + "))", re.IGNORECASE | re.ASCII
+        )
+
+        # The longest keyword at a position hides shorter keywords that are its prefixes
+        self._implied = {
+            i: [j for j, other in enumerate(self.keywords) if j != i and keyword.startswith(other)]
+            for i, keyword in enumerate(self.keywords)
+        }
+
+    def finditer(self, text: str) -> Iterator[Tuple[int, int]]:
+        """Yield (start offset, keyword index) for every keyword occurrence"""
+        index = self.index
+        implied = self._implied
+        for match in self._pattern.finditer(text):
+            keyword_id = index[match.group(1).lower()]
+            yield match.start(), keyword_id
+            for other in implied[keyword_id]:
+                yield match.start(), other
+
+    def scan(self, text: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Return parallel arrays of match start offsets and keyword indices"""
+        flat = np.fromiter(
+            (value for hit in self.finditer(text) for value in hit),
+            dtype=np.int64
+        )
+        return flat[0::2], flat[1::2]
+
+    def hit_matrix(self, text: str, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+        """
+        Count keyword hits per span in a single pass over `text`
+
+        Args:
+            starts, ends: Sorted, non-overlapping span offsets (e.g. sections)
+
+        Returns:
+            int matrix of shape (spans, keywords)
+        """
+        counts = np.zeros((len(starts), len(self.keywords)), dtype=np.int32)
+        if not len(starts):
+            return counts
+
+        positions, keyword_ids = self.scan(text)
+        span_ids = np.searchsorted(starts, positions, side="right") - 1
+        inside = span_ids >= 0
+        inside[inside] &= positions[inside] + self.lengths[keyword_ids[inside]] <= ends[span_ids[inside]]
+
+        np.add.at(counts, (span_ids[inside], keyword_ids[inside]), 1)
+        return counts
@@ -0,0 +1,56 @@
+"""
+Character offset to page number index for extracted contract text
+"""
+import re
+from bisect import bisect_right
+from typing import Dict, List, Optional
+
+
+PAGE_MARKER = re.compile(r'\[Page (\d+)(?: OCR)?\]\n')
+
+
+class PageIndex:
+    """Sorted page start offsets; maps any offset in the text to its page in O(log pages)"""
+
+    def __init__(self, page_starts: List[int] = None, page_numbers: List[int] = None):
+        """
+        Args:
+            page_starts: Offset where each page's text begins, ascending
+            page_numbers: Page number of each start (defaults to 1, 2, ...)
+        """
+        self.page_starts = list(page_starts or [])
+        self.page_numbers = list(page_numbers or range(1, len(self.page_starts) + 1))
+
+    def add_page(self, offset: int, page_number: int = None):
+        """Record that a page starts at `offset` (call while concatenating pages)"""
+        self.page_starts.append(offset)
+        self.page_numbers.append(page_number or len(self.page_numbers) + 1)
+
+    @classmethod
+    def from_marked_text(cls, text: str) -> "PageIndex":
+        """Rebuild the index from inline "[Page N]" markers written by reader.read_pdf"""
+        index = cls()
+        for match in PAGE_MARKER.finditer(text):
+            index.add_page(match.end(), int(match.group(1)))
+        return index
+
+    def page_of(self, offset: int) -> Optional[int]:
+        """Page containing `offset` (None when the text has no page information)"""
+        i = bisect_right(self.page_starts, offset) - 1
+        if i < 0:
+            return self.page_numbers[0] if self.page_numbers else None
+        return self.page_numbers[i]
+
+    def locate(self, start: int, end: int) -> Dict:
+        """Location record of a span: page, document offsets and offset within the page"""
+        i = bisect_right(self.page_starts, start) - 1
+        page_start = self.page_starts[i] if i >= 0 else 0
+        return {
+            "page": self.page_of(start),
+            "start": start,
+            "end": end,
+            "page_offset": start - page_start
+        }
+
+    def __len__(self) -> int:
+        return len(self.page_starts)
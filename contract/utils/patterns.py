@@ -0,0 +1,121 @@
+"""
+Registry of precompiled regular expressions shared by the extraction modules
+"""
+import re
+from functools import lru_cache
+from typing import Dict, List, Sequence, Tuple
+
+from utils.matching import build_trie_pattern
+
+
+class PatternRegistry:
+    """Named regex patterns, compiled once per process on first use"""
+
+    def __init__(self):
+        self._sources: Dict[str, Tuple[str, int]] = {}
+        self._compiled: Dict[str, re.Pattern] = {}
+
+    def register(self, name: str, pattern: str, flags: int = 0):
+        """Register (or replace) a named pattern"""
+        self._sources[name] = (pattern, flags)
+        self._compiled.pop(name, None)
+
+    def get(self, name: str) -> re.Pattern:
+        """Compiled pattern by name"""
+        compiled = self._compiled.get(name)
+        if compiled is None:
+            pattern, flags = self._sources[name]
+            compiled = self._compiled[name] = re.compile(pattern, flags)
+        return compiled
+
+    __getitem__ = get
+
+    def names(self) -> List[str]:
+        return list(self._sources)
+
+
+PATTERNS = PatternRegistry()
+
+# Defined terms: "Term" means...
+PATTERNS.register("defined_term", r'"([^"]+)"\s+(?:means?|refers? to|is defined as)\s+([^.]+\.)',
+                  re.IGNORECASE)
+PATTERNS.register("definitions_section", r'definitions.*?(?=\n\s*\d+\.|\Z)', re.IGNORECASE | re.DOTALL)
+PATTERNS.register("definition_entry", r'([A-Z][a-zA-Z\s]+):\s+([^;]+);')
+
+# Parties: "between X and Y", "Name" (... / "Name" referred to as, and (the "Name") right after a
+# party's name. Other parenthesised defined terms ((the "Agreement"), (the "Effective Date")) are not parties.
+_ALIAS = r'\((?i:the\s+|hereinafter\s+(?:referred\s+to\s+as\s+|called\s+)?)?"(?P<alias>[^"]+)"\)'
+_NAME = r"[A-Z][\w&.'-]*(?:\s+[A-Z&][\w&.'-]*){0,7}"
+_ENTITY_SUFFIX = (r"(?i:inc|llc|l\.l\.c|ltd|limited|corp|corporation|company|co|gmbh|llp|lp|plc|pvt|"
+                  r"ag|s\.a|n\.v|b\.v)\b\.?")
+PATTERNS.register("parties_between", r"between\s+([^,\n]+?)\s+(?:and|&)\s+([^,\n]+?)(?:\.|,|\n)",
+                  re.IGNORECASE)
+PATTERNS.register("party_alias", r'"([^"]+)"\s*(?:\(|referred to as)')
+PATTERNS.register(
+    "party_defined_as",
+    rf"(?:\b(?i:between|and)\s+{_NAME}|\b{_NAME}\s+{_ENTITY_SUFFIX}),?\s*{_ALIAS}"
+)
+PATTERNS.register("alias_parenthetical", rf"\s*{_ALIAS}")
+
+# Paragraphs of the preamble for spaCy party detection
+PATTERNS.register("paragraph_break", r'\n\s*\n')
+
+OBLIGATION_VERBS = r'(?:shall|must|will|agrees to|is\s+(?:required|obligated)\s+to)'
+
+
+@lru_cache(maxsize=128)
+def obligation_pattern(parties: Tuple[str, ...]) -> re.Pattern:
+    """
+    One pattern matching obligations of any of `parties`
+
+    The party alternation is trie-factored, so a single scan finds the
+    obligations of every party instead of one scan per party.
+    """
+    party_names = build_trie_pattern(sorted({p.lower() for p in parties}))
+    return re.compile(
+        rf'(?:\bThe\s+)?\b(?P<party>{party_names})\s+{OBLIGATION_VERBS}\s+(?P<obligation>[^.]+\.)',
+        re.IGNORECASE
+    )
+
+
+def extract_contract_parties(text: str, max_parties: int = 5) -> List[str]:
+    """Extract party names from contract text ("between X and Y" and quoted aliases)"""
+    parties = []
+
+    # "between Acme Corp ("Customer") and ..." -> "Acme Corp"
+    strip_alias = PATTERNS["alias_parenthetical"]
+    for match in PATTERNS["parties_between"].finditer(text):
+        parties.extend(strip_alias.sub("", match.group(i)).strip() for i in (1, 2))
+
+    for match in PATTERNS["party_alias"].finditer(text):
+        parties.append(match.group(1).strip())
+    for match in PATTERNS["party_defined_as"].finditer(text):
+        parties.append(match.group("alias").strip())
+
+    # Unique parties in order of appearance
+    return list(dict.fromkeys(p for p in parties if p))[:max_parties]
+
+
+def extract_obligations_for_parties(text: str, parties: Sequence[str],
+                                    limit_per_party: int = 20) -> Dict[str, List[Dict]]:
+    """
+    Extract obligations for all parties in one pass over the text
+
+    Returns:
+        Dict mapping each party to its obligations (party, obligation, context)
+    """
+    canonical = {p.lower(): p for p in parties if p}
+    obligations: Dict[str, List[Dict]] = {p: [] for p in canonical.values()}
+    if not canonical:
+        return obligations
+
+    for match in obligation_pattern(tuple(sorted(canonical))).finditer(text):
+        party = canonical.get(match.group("party").lower())
+        if party and len(obligations[party]) < limit_per_party:
+            obligations[party].append({
+                "party": party,
+                "obligation": match.group("obligation").strip(),
+                "context": match.group(0)
+            })
+
+    return obligations
@@ -0,0 +1,98 @@
+"""
+Compact, offset-based records over a shared contract text buffer
+"""
+import re
+from typing import Dict, List, Sequence
+
+
+SENTENCE_BREAK = re.compile(r'[.!?]\s+')
+
+
+def section_title(text: str) -> str:
+    """Short heading line, or else the first sentence, of a section body"""
+    # Look for title in first line or first sentence
+    body = text.strip()
+    first_line = body.split('\n', 1)[0]
+    
+    # If first line is short and in title case or all caps, use it
+    if len(first_line.split()) <= 10:
+        if first_line.isupper() or first_line.istitle():
+            return first_line.strip()
+    
+    # Otherwise, use first sentence (max 100 chars)
+    title = SENTENCE_BREAK.split(text, 1)[0][:100].strip()
+    return title or "Untitled Clause"
+
+
+class ClauseRecord:
+    """
+    A classified clause stored as offsets into the shared document text
+
+    Text fields (content, full_content, title) are materialized on access,
+    so a contract's clauses hold one reference to the document instead of
+    copies of every section. Supports dict-style access for existing callers.
+    """
+
+    __slots__ = ("doc", "type_names", "section_number", "label", "level",
+                 "start", "end", "body_start", "type_mask", "importance", "_word_count")
+
+    FIELDS = ("section_number", "label", "level", "start", "end", "title", "content",
+              "full_content", "clause_types", "word_count", "importance")
+
+    def __init__(self, doc: str, type_names: Sequence[str], section_number: int, label: str,
+                 level: int, start: int, end: int, body_start: int, type_mask: int,
+                 importance: float):
+        self.doc = doc
+        self.type_names = type_names
+        self.section_number = section_number
+        self.label = label
+        self.level = level
+        self.start = start
+        self.end = end
+        self.body_start = body_start
+        self.type_mask = type_mask
+        self.importance = importance
+        self._word_count = None
+
+    @property
+    def full_content(self) -> str:
+        return self.doc[self.start:self.end].strip()
+
+    @property
+    def content(self) -> str:
+        """First 500 characters of the clause"""
+        return self.full_content[:500]
+
+    @property
+    def title(self) -> str:
+        return section_title(self.doc[self.body_start:self.end])
+
+    @property
+    def clause_types(self) -> List[str]:
+        return [name for bit, name in enumerate(self.type_names) if self.type_mask >> bit & 1]
+
+    @property
+    def word_count(self) -> int:
+        if self._word_count is None:
+            self._word_count = len(self.doc[self.start:self.end].split())
+        return self._word_count
+
+    def __getitem__(self, key: str):
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default=None):
+        return getattr(self, key) if key in self.FIELDS else default
+
+    def keys(self):
+        return self.FIELDS
+
+    def to_dict(self, include_text: bool = True) -> Dict:
+        """Serialize the record; offsets only unless `include_text` is set"""
+        fields = self.FIELDS if include_text else tuple(
+            f for f in self.FIELDS if f not in ("title", "content", "full_content"))
+        return {field: getattr(self, field) for field in fields}
+
+    def __repr__(self) -> str:
+        return f"ClauseRecord({self.label!r}, span=({self.start}, {self.end}), types={self.clause_types})"
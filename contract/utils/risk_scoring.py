@@ -0,0 +1,219 @@
+"""
+Length-normalized, calibrated risk scoring over rule findings
+"""
+import os
+import json
+import math
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+
+SCORER_PATH = os.getenv(
+    "RISK_SCORER_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "models", "risk_scorer.json")
+)
+
+DOCUMENT_FEATURES = ("log_length", "findings_per_clause")
+
+
+def rule_key(finding: Dict) -> str:
+    """Rule name of a finding (older stored findings only carry the display name)"""
+    return finding.get("rule") or finding["risk_type"].lower().replace(" ", "_")
+
+
+class RiskScorer:
+    """
+    Logistic risk model: P(high risk) = sigmoid(bias + w . x), reported on a 0-10 scale
+
+    Features per rule are its presence (1, or the similarity for semantic-only
+    findings) and its density, log1p(occurrences per 1,000 words), so a long
+    contract repeating a clause does not outscore a short one that has it
+    once. Document features are log length and findings per clause.
+
+    Untrained weights come from the rulebook weights and cover presence only,
+    so the same findings score the same at any length; density and the
+    document features get weight only from `fit`, which learns them from
+    labeled contracts (python -m utils.risk_scoring labels.csv).
+    """
+
+    BIAS = -4.0
+    PRESENCE_SCALE = 10.0  # every rule of a ruleset firing adds this much to the logit
+    MAX_CACHED_VECTORS = 8
+
+    def __init__(self, weights: Dict[str, float] = None, bias: float = None, version: str = "default"):
+        """
+        Args:
+            weights: Learned weights by feature name; missing features use the defaults
+        """
+        self.weights = dict(weights or {})
+        self.bias = self.BIAS if bias is None else bias
+        self.version = version
+        self._vectors: Dict[Tuple, np.ndarray] = {}
+
+    @classmethod
+    def load(cls, path: str = SCORER_PATH) -> "RiskScorer":
+        """Load trained weights, or the rulebook-derived defaults if none were saved"""
+        if not os.path.exists(path):
+            return cls()
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["weights"], data["bias"], data.get("version", "trained"))
+
+    def save(self, path: str = SCORER_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"version": self.version, "bias": self.bias, "weights": self.weights}, f, indent=2)
+
+    @staticmethod
+    def feature_names(rules: Dict[str, Dict]) -> List[str]:
+        names = []
+        for rule_name in rules:
+            names.extend([f"presence:{rule_name}", f"density:{rule_name}"])
+        return names + list(DOCUMENT_FEATURES)
+
+    def weight_vector(self, rules: Dict[str, Dict]) -> np.ndarray:
+        """Weights aligned with feature_names(rules), cached for the last few rule sets"""
+        key = tuple((name, rule.get("weight", 0)) for name, rule in rules.items())
+        vector = self._vectors.get(key)
+        if vector is None:
+            total = sum(rule.get("weight", 0) for rule in rules.values()) or 1
+            # Length-dependent features (density, log length, findings per clause) stay at 0 until trained
+            defaults = {
+                f"presence:{rule_name}": self.PRESENCE_SCALE * rule.get("weight", 0) / total
+                for rule_name, rule in rules.items()
+            }
+            vector = np.array([
+                self.weights.get(name, defaults.get(name, 0.0)) for name in self.feature_names(rules)
+            ])
+            # Old rulebook versions fall out instead of accumulating across reloads
+            while len(self._vectors) >= self.MAX_CACHED_VECTORS:
+                self._vectors.pop(next(iter(self._vectors)), None)
+            self._vectors[key] = vector
+        return vector
+
+    def features(self, rules: Dict[str, Dict], findings: Sequence[Dict], word_count: int,
+                 clause_count: int = 0) -> np.ndarray:
+        """Feature vector of one analysed contract"""
+        column = {name: i for i, name in enumerate(rules)}
+        x = np.zeros(2 * len(rules) + len(DOCUMENT_FEATURES))
+        per_thousand = 1000.0 / max(word_count, 1)
+        for finding in findings:
+            i = column.get(rule_key(finding))
+            if i is None:
+                continue
+            similarity = finding.get("semantic_similarity")
+            x[2 * i] = similarity if finding.get("detection") == "semantic" and similarity else 1.0
+            x[2 * i + 1] = math.log1p(finding.get("occurrences", 1) * per_thousand)
+        x[-2] = math.log1p(word_count / 1000.0)
+        x[-1] = len(findings) / clause_count if clause_count else 0.0
+        return x
+
+    def score_matrix(self, rules: Dict[str, Dict], X: np.ndarray) -> np.ndarray:
+        """Vectorized 0-10 scores for a (contracts x features) matrix"""
+        return 10.0 / (1.0 + np.exp(-(X @ self.weight_vector(rules) + self.bias)))
+
+    def score_many(self, rules: Dict[str, Dict], contracts: Sequence[Tuple[Sequence[Dict], int, int]]) -> np.ndarray:
+        """Score many contracts at once from (findings, word_count, clause_count) tuples"""
+        if not contracts:
+            return np.zeros(0)
+        X = np.vstack([self.features(rules, *contract) for contract in contracts])
+        return self.score_matrix(rules, X)
+
+    def score(self, rules: Dict[str, Dict], findings: Sequence[Dict], word_count: int,
+              clause_count: int = 0, top: int = 5) -> Dict:
+        """
+        Score one contract and explain it
+
+        Returns:
+            Dict with risk_score (0-10), probability and the features that
+            moved the score most (contributions to the log-odds)
+        """
+        names = self.feature_names(rules)
+        x = self.features(rules, findings, word_count, clause_count)
+        contributions = x * self.weight_vector(rules)
+        score = float(self.score_matrix(rules, x[None, :])[0])
+
+        order = np.argsort(-np.abs(contributions))[:top]
+        return {
+            "risk_score": round(score, 2),
+            "probability": round(score / 10.0, 4),
+            "scoring_model": self.version,
+            "score_explanation": [
+                {"feature": names[i], "value": round(float(x[i]), 4), "contribution": round(float(contributions[i]), 4)}
+                for i in order if contributions[i]
+            ]
+        }
+
+    def fit(self, rules: Dict[str, Dict], X: np.ndarray, y: np.ndarray, l2: float = 1.0,
+            iterations: int = 25, version: str = "trained") -> "RiskScorer":
+        """
+        Learn weights by L2-regularized logistic regression (Newton's method)
+
+        Args:
+            X: Feature matrix built with `features` (contracts x features)
+            y: 1 for contracts reviewers rated high risk, else 0
+        """
+        X = np.asarray(X, dtype=float)
+        y = np.asarray(y, dtype=float)
+        Xb = np.hstack([X, np.ones((len(X), 1))])
+        w = np.append(self.weight_vector(rules), self.bias)
+        penalty = np.full(len(w), l2)
+        penalty[-1] = 0.0  # bias is not regularized
+
+        for _ in range(iterations):
+            p = 1.0 / (1.0 + np.exp(-(Xb @ w)))
+            gradient = Xb.T @ (p - y) + penalty * w
+            hessian = (Xb * (p * (1 - p))[:, None]).T @ Xb + np.diag(penalty + 1e-9)
+            step = np.linalg.solve(hessian, gradient)
+            w -= step
+            if np.abs(step).max() < 1e-6:
+                break
+
+        self.weights = dict(zip(self.feature_names(rules), w[:-1].tolist()))
+        self.bias = float(w[-1])
+        self.version = version
+        self._vectors.clear()
+        return self
+
+
+if __name__ == "__main__":
+    # python -m utils.risk_scoring labels.csv --output models/risk_scorer.json
+    # labels.csv: path,label with label 1 for contracts reviewers rated high risk
+    import csv
+    import argparse
+    from utils.advanced_risk_analyzer import AdvancedRiskAnalyzer
+
+    parser = argparse.ArgumentParser(description="Train the risk scoring model from labeled contracts")
+    parser.add_argument("labels", help="CSV with 'path' (PDF or text file) and 'label' (0/1) columns")
+    parser.add_argument("--output", default=SCORER_PATH)
+    parser.add_argument("--l2", type=float, default=1.0, help="L2 regularization strength")
+    parser.add_argument("--version", default="trained")
+    args = parser.parse_args()
+
+    with open(args.labels, newline="", encoding="utf-8") as f:
+        labeled = [(row["path"], int(row["label"])) for row in csv.DictReader(f)]
+    if len({label for _, label in labeled}) < 2:
+        raise SystemExit("Need contracts labeled both 0 and 1")
+
+    analyzer = AdvancedRiskAnalyzer(scorer=RiskScorer())
+    rules = analyzer.rule_engine.rulebook.rules(analyzer.RULESET)
+    rows, y = [], []
+    for i, (path, label) in enumerate(labeled, 1):
+        if path.lower().endswith(".pdf"):
+            from reader import read_pdf_pages
+            text, page_index = read_pdf_pages(path)
+        else:
+            with open(path, "r", encoding="utf-8") as f:
+                text, page_index = f.read(), None
+        # Same findings, length and clause count as at scoring time
+        clauses = analyzer.clause_extractor.extract_clauses(text)
+        findings = analyzer.analyze(text, clauses=clauses, page_index=page_index)["findings"]
+        rows.append(analyzer.scorer.features(rules, findings, len(text.split()), len(clauses)))
+        y.append(label)
+        print(f"\r  analyzed {i}/{len(labeled)} contracts", end="", flush=True)
+
+    scorer = RiskScorer().fit(rules, np.vstack(rows), np.array(y), l2=args.l2, version=args.version)
+    scorer.save(args.output)
+    accuracy = float(((scorer.score_matrix(rules, np.vstack(rows)) >= 5.0) == np.array(y, dtype=bool)).mean())
+    print(f"\n✅ {len(labeled)} contracts, training accuracy {accuracy:.1%} -> {args.output}")
@@ -0,0 +1,387 @@
+"""
+Versioned, hot-reloadable risk rulebook compiled into a single matcher per ruleset
+"""
+import os
+import re
+import json
+import time
+import threading
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from utils.matching import KeywordMatcher, build_trie_pattern
+
+
+DEFAULT_RULES_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "rules", "risk_rules.json"
+)
+RULES_PATH = os.getenv("RISK_RULES_PATH", DEFAULT_RULES_PATH)
+RULES_CHECK_INTERVAL = float(os.getenv("RISK_RULES_CHECK_INTERVAL", "5"))
+
+
+class RulebookError(ValueError):
+    """Raised when a rulebook cannot be parsed or validated"""
+
+
+class CompiledRulebook:
+    """
+    Immutable compiled rulebook; replaced as a whole on reload
+
+    Besides "keywords", a rule may set:
+        near: terms of which one must occur within `window` tokens of the keyword
+        window: proximity window in tokens (default 12)
+        negatable: drop hits preceded by a negation cue in the same sentence
+                   ("shall not be required to indemnify")
+        section_types: only fire inside clauses of these ClauseExtractor types
+        prototypes: example clauses for embedding-based detection of paraphrases
+        similarity_threshold: minimum cosine similarity to a prototype
+                              (default: the rulebook's "semantic" threshold)
+    """
+
+    DEFAULT_WINDOW = 12
+    DEFAULT_SIMILARITY = 0.6
+    DEFAULT_NEGATION = {
+        "cues": ["not", "no", "never", "neither", "nor", "cannot", "nothing", "none"],
+        "terminators": ["but", "however", "except", "unless", "provided"],
+        "window": 6
+    }
+
+    def __init__(self, data: Dict, source: str = None, mtime: float = None):
+        """
+        Compile a parsed rulebook
+
+        Args:
+            data: {"version": ..., "negation": {...}, "rulesets": {name: {rule_name: {"keywords": [...], ...}}}}
+        """
+        self._validate(data)
+
+        self.version = str(data.get("version", "unversioned"))
+        self.source = source
+        self.mtime = mtime
+        self.loaded_at = datetime.utcnow()
+        self.rulesets: Dict[str, Dict[str, Dict]] = data["rulesets"]
+
+        self.similarity_threshold = float(
+            data.get("semantic", {}).get("threshold", self.DEFAULT_SIMILARITY)
+        )
+
+        negation = {**self.DEFAULT_NEGATION, **data.get("negation", {})}
+        self.negation_window = int(negation["window"])
+        # One token pass classifies every word as negation cue, scope terminator or plain token
+        self._token_pattern = re.compile(
+            r"(?P<boundary>[.;!?](?=\s|$)|\n\s*\n)"
+            rf"|(?P<cue>\b(?:{build_trie_pattern(w.lower() for w in negation['cues'])})\b|\b\w+n't\b)"
+            rf"|(?P<terminator>\b(?:{build_trie_pattern(w.lower() for w in negation['terminators'])})\b)"
+            r"|(?P<token>\w+)",
+            re.IGNORECASE
+        )
+
+        self._matchers: Dict[str, KeywordMatcher] = {}
+        self._keyword_rules: Dict[str, List[List[Tuple[str, bool]]]] = {}
+        self._contextual: Dict[str, bool] = {}
+        for ruleset, rules in self.rulesets.items():
+            keywords = []
+            for rule in rules.values():
+                keywords.extend(rule["keywords"])
+                keywords.extend(rule.get("near", []))
+
+            # Rule keywords and proximity terms share one matcher: (rule, is_proximity_term)
+            matcher = KeywordMatcher(keywords)
+            keyword_rules = [[] for _ in matcher.keywords]
+            for rule_name, rule in rules.items():
+                for terms, near in ((rule["keywords"], False), (rule.get("near", []), True)):
+                    for term in terms:
+                        owners = keyword_rules[matcher.index[term.lower()]]
+                        if (rule_name, near) not in owners:
+                            owners.append((rule_name, near))
+
+            self._matchers[ruleset] = matcher
+            self._keyword_rules[ruleset] = keyword_rules
+            self._contextual[ruleset] = any(
+                rule.get("near") or rule.get("negatable") for rule in rules.values()
+            )
+
+    @classmethod
+    def _validate(cls, data) -> None:
+        """Check the rulebook's shape, raising RulebookError on the first problem"""
+        if not isinstance(data, dict):
+            raise RulebookError(f"Rulebook must be a mapping, not {type(data).__name__}")
+        if not isinstance(data.get("rulesets"), dict):
+            raise RulebookError("Rulebook must define a 'rulesets' mapping")
+
+        for section in ("negation", "semantic"):
+            if not isinstance(data.get(section, {}), dict):
+                raise RulebookError(f"'{section}' must be a mapping")
+        negation = data.get("negation", {})
+        for key in ("cues", "terminators"):
+            cls._check_terms(negation.get(key, cls.DEFAULT_NEGATION[key]), f"negation.{key}")
+        cls._check_number(negation.get("window", cls.DEFAULT_NEGATION["window"]), "negation.window")
+        cls._check_number(data.get("semantic", {}).get("threshold", cls.DEFAULT_SIMILARITY), "semantic.threshold")
+
+        for ruleset, rules in data["rulesets"].items():
+            if not isinstance(rules, dict):
+                raise RulebookError(f"Ruleset '{ruleset}' must map rule names to rules")
+            for rule_name, rule in rules.items():
+                name = f"{ruleset}.{rule_name}"
+                if not isinstance(rule, dict):
+                    raise RulebookError(f"Rule '{name}' must be a mapping, not {type(rule).__name__}")
+                if not rule.get("keywords"):
+                    raise RulebookError(f"Rule '{name}' has no keywords")
+                for key in ("keywords", "near", "section_types", "prototypes"):
+                    cls._check_terms(rule.get(key, []), f"{name}.{key}")
+                for key in ("weight", "window", "similarity_threshold"):
+                    if key in rule:
+                        cls._check_number(rule[key], f"{name}.{key}")
+
+    @staticmethod
+    def _check_terms(value, name: str) -> None:
+        if not isinstance(value, list) or not all(isinstance(term, str) and term for term in value):
+            raise RulebookError(f"'{name}' must be a list of non-empty strings")
+
+    @staticmethod
+    def _check_number(value, name: str) -> None:
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise RulebookError(f"'{name}' must be a number")
+
+    def rules(self, ruleset: str) -> Dict[str, Dict]:
+        """Rule definitions of a ruleset, in rulebook order"""
+        return self.rulesets.get(ruleset, {})
+
+    def needs_sections(self, ruleset: str) -> bool:
+        """Whether any rule of the ruleset is constrained to section types"""
+        return any(rule.get("section_types") for rule in self.rules(ruleset).values())
+
+    def prototypes(self, ruleset: str) -> List[Tuple[str, str, float]]:
+        """(rule name, prototype text, similarity threshold) for semantic detection"""
+        return [
+            (rule_name, prototype, float(rule.get("similarity_threshold", self.similarity_threshold)))
+            for rule_name, rule in self.rules(ruleset).items()
+            for prototype in rule.get("prototypes", [])
+        ]
+
+    def match(self, ruleset: str, text: str,
+              sections: Sequence[Tuple[int, int, Set[str]]] = None) -> Dict[str, List[Tuple[int, int]]]:
+        """
+        Scan text once for every rule of a ruleset
+
+        Args:
+            sections: Sorted, non-overlapping (start, end, clause types) spans; section
+                      constraints are only enforced when sections are given
+
+        Returns:
+            Dict mapping fired rule names to their (start, end) match spans
+        """
+        matcher = self._matchers.get(ruleset)
+        if matcher is None:
+            return {}
+
+        rules = self.rulesets[ruleset]
+        keyword_rules = self._keyword_rules[ruleset]
+        candidates = defaultdict(list)
+        near_hits = defaultdict(list)
+        for start, keyword_id in matcher.finditer(text):
+            end = start + len(matcher.keywords[keyword_id])
+            for rule_name, near in keyword_rules[keyword_id]:
+                (near_hits if near else candidates)[rule_name].append((start, end))
+
+        if not candidates:
+            return {}
+
+        stream = self._token_stream(text) if self._contextual[ruleset] else None
+        section_starts = [section[0] for section in sections] if sections is not None else None
+
+        spans = {}
+        for rule_name, hits in candidates.items():
+            rule = rules[rule_name]
+            if rule.get("near"):
+                near_positions = self._positions(stream, near_hits.get(rule_name, ()))
+            kept = []
+            for start, end in hits:
+                if rule.get("section_types") and section_starts is not None:
+                    i = bisect_right(section_starts, start) - 1
+                    if i < 0 or start >= sections[i][1] or not sections[i][2] & set(rule["section_types"]):
+                        continue
+                if rule.get("negatable") and self._negated(stream, start):
+                    continue
+                if rule.get("near") and not self._near(stream, start, near_positions,
+                                                       rule.get("window", self.DEFAULT_WINDOW)):
+                    continue
+                kept.append((start, end))
+            if kept:
+                spans[rule_name] = kept
+        return spans
+
+    def _token_stream(self, text: str) -> Dict[str, List[int]]:
+        """Offsets of tokens, negation cues, scope terminators and sentence boundaries"""
+        stream = {"token": [], "cue": [], "terminator": [], "boundary": []}
+        tokens = stream["token"]
+        for match in self._token_pattern.finditer(text):
+            kind = match.lastgroup
+            if kind != "boundary":
+                tokens.append(match.start())
+            if kind != "token":
+                stream[kind].append(match.start())
+        return stream
+
+    def _negated(self, stream: Dict[str, List[int]], start: int) -> bool:
+        """Whether a negation cue governs the keyword starting at `start`"""
+        cues = stream["cue"]
+        i = bisect_left(cues, start) - 1
+        if i < 0:
+            return False
+        cue = cues[i]
+        # Same sentence, no "but"/"except" in between, and close enough in tokens
+        if bisect_left(stream["boundary"], start) != bisect_left(stream["boundary"], cue):
+            return False
+        if bisect_left(stream["terminator"], start) != bisect_left(stream["terminator"], cue):
+            return False
+        tokens = stream["token"]
+        return bisect_left(tokens, start) - bisect_left(tokens, cue) <= self.negation_window
+
+    def _near(self, stream: Dict[str, List[int]], start: int,
+              near_positions: Tuple[List[int], List[int]], window: int) -> bool:
+        """Whether a proximity term occurs within `window` tokens in the same sentence"""
+        near_tokens, near_sentences = near_positions
+        position = bisect_left(stream["token"], start)
+        sentence = bisect_left(stream["boundary"], start)
+        i = bisect_left(near_tokens, position - window)
+        while i < len(near_tokens) and near_tokens[i] <= position + window:
+            if near_sentences[i] == sentence:
+                return True
+            i += 1
+        return False
+
+    @staticmethod
+    def _positions(stream: Dict[str, List[int]], hits: Sequence[Tuple[int, int]]) -> Tuple[List[int], List[int]]:
+        """Token and sentence indices of (sorted) match spans"""
+        tokens, boundaries = stream["token"], stream["boundary"]
+        return ([bisect_left(tokens, start) for start, _ in hits],
+                [bisect_left(boundaries, start) for start, _ in hits])
+
+
+def load_rulebook(path: str) -> CompiledRulebook:
+    """Parse and compile a JSON (or YAML, if PyYAML is installed) rulebook"""
+    mtime = os.path.getmtime(path)
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith((".yaml", ".yml")):
+            import yaml
+            data = yaml.safe_load(f)
+        else:
+            data = json.load(f)
+    return CompiledRulebook(data, source=path, mtime=mtime)
+
+
+class RuleEngine:
+    """
+    Serves the current compiled rulebook and hot-reloads it when the file changes
+
+    Readers grab the current CompiledRulebook reference and never block; a
+    reload compiles the new rulebook first and then swaps the reference, so a
+    bad edit leaves the previous rules in service.
+    """
+
+    def __init__(self, path: str = RULES_PATH, check_interval: float = RULES_CHECK_INTERVAL):
+        """Load the rulebook at `path` (errors at startup are raised)"""
+        self.path = path
+        self.check_interval = check_interval
+        self.last_error: Optional[str] = None
+        self._reload_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._hits = defaultdict(lambda: defaultdict(int))
+        self._occurrences = defaultdict(lambda: defaultdict(int))
+        self._book = load_rulebook(path)
+        self._failed_mtime = None
+        self._last_check = time.monotonic()
+
+    @property
+    def rulebook(self) -> CompiledRulebook:
+        """Current rulebook, checking the file for changes at most every check_interval seconds"""
+        if time.monotonic() - self._last_check >= self.check_interval:
+            self.reload()
+        return self._book
+
+    def reload(self, force: bool = False) -> bool:
+        """
+        Reload the rulebook if its file changed (or unconditionally with `force`)
+
+        Returns:
+            True if a new rulebook was swapped in
+        """
+        if not self._reload_lock.acquire(blocking=False):
+            return False  # Another thread is already reloading
+        try:
+            self._last_check = time.monotonic()
+            mtime = None
+            try:
+                mtime = os.path.getmtime(self.path)
+                if not force and mtime in (self._book.mtime, self._failed_mtime):
+                    return False
+                book = load_rulebook(self.path)
+            except Exception as e:  # unreadable file, YAML/JSON syntax, bad structure
+                # Keep serving the previous rulebook; retry once the file changes again
+                self._failed_mtime = mtime
+                self.last_error = f"{type(e).__name__}: {e}"
+                print(f"Warning: risk rulebook not reloaded ({self.last_error})")
+                return False
+
+            self._book = book
+            self.last_error = None
+            return True
+        finally:
+            self._reload_lock.release()
+
+    def match(self, ruleset: str, text: str, sections: Sequence[Tuple[int, int, Set[str]]] = None
+              ) -> Tuple[CompiledRulebook, Dict[str, List[Tuple[int, int]]]]:
+        """
+        Match a ruleset against text and record per-rule hit counters
+
+        Returns:
+            (rulebook used, {rule_name: spans}) so callers read rule metadata
+            from the same version that produced the matches
+        """
+        book = self.rulebook
+        spans = book.match(ruleset, text, sections)
+        if spans:
+            with self._stats_lock:
+                for rule_name, rule_spans in spans.items():
+                    self._hits[ruleset][rule_name] += 1
+                    self._occurrences[ruleset][rule_name] += len(rule_spans)
+        return book, spans
+
+    def stats(self) -> Dict:
+        """Rulebook version and per-rule hit counters since process start"""
+        book = self._book
+        with self._stats_lock:
+            counters = {
+                ruleset: {
+                    rule_name: {
+                        "documents": self._hits[ruleset].get(rule_name, 0),
+                        "occurrences": self._occurrences[ruleset].get(rule_name, 0)
+                    }
+                    for rule_name in rules
+                }
+                for ruleset, rules in book.rulesets.items()
+            }
+        return {
+            "version": book.version,
+            "source": book.source,
+            "loaded_at": book.loaded_at.isoformat(),
+            "last_error": self.last_error,
+            "rules": counters
+        }
+
+
+_engine: Optional[RuleEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_rule_engine() -> RuleEngine:
+    """Process-wide rule engine"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = RuleEngine()
+    return _engine
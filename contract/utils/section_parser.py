@@ -0,0 +1,178 @@
+"""
+Single-pass structural parser for contract section numbering
+"""
+import re
+from typing import List, Optional
+
+
+# One compiled pattern for every heading style we recognize, anchored at line start
+HEADING_PATTERN = re.compile(
+    r'^[ \t]*(?:'
+    r'(?P<article>ARTICLE|Article)\s+(?P<article_num>[IVXLC]+|\d+)\b[.:]?'
+    r'|(?P<section>SECTION|Section)\s+(?P<section_num>\d+(?:\.\d+)*)\b[.:]?'
+    r'|(?P<decimal>\d{1,3}(?:\.\d{1,3})+)\.?'
+    r'|(?P<number>\d{1,3})[.)]'
+    r'|\((?P<paren>[a-z]{1,2}|[ivxlc]{1,6}|[A-Z]|\d{1,3})\)'
+    r')[ \t]+',
+    re.MULTILINE
+)
+
+PARAGRAPH_BREAK = re.compile(r'\n[ \t]*\n')
+
+ROMAN_CHARS = set("ivxlc")
+
+# Ranked kinds nest by rank; list kinds ((a), (i), (A), (1)) nest by first appearance
+ARTICLE_RANK = 0
+SECTION_RANK = 1
+
+
+class Section:
+    """A contract section as character offsets into the source text"""
+
+    __slots__ = ("start", "end", "body_start", "subtree_end", "level", "kind", "label", "parent")
+
+    def __init__(self, start: int, end: int, body_start: int, level: int,
+                 kind: str, label: str, parent: Optional[int]):
+        self.start = start
+        self.end = end
+        self.body_start = body_start
+        self.subtree_end = end
+        self.level = level
+        self.kind = kind
+        self.label = label
+        self.parent = parent
+
+    def text(self, doc: str) -> str:
+        """Own text of the section (heading up to the next heading)"""
+        return doc[self.start:self.end]
+
+    def subtree_text(self, doc: str) -> str:
+        """Text of the section including all nested subsections"""
+        return doc[self.start:self.subtree_end]
+
+    def __repr__(self) -> str:
+        return f"Section({self.label!r}, level={self.level}, span=({self.start}, {self.end}))"
+
+
+def _classify_heading(match: re.Match, stack: List[tuple]) -> tuple:
+    """Return (kind, rank, label) for a heading match; rank is None for list kinds"""
+    if match.group("article"):
+        return "article", ARTICLE_RANK, f"Article {match.group('article_num')}"
+    if match.group("section"):
+        return "section", SECTION_RANK, f"Section {match.group('section_num')}"
+    if match.group("decimal"):
+        label = match.group("decimal")
+        depth = label.count(".") + 1
+        return f"decimal-{depth}", SECTION_RANK + depth, label
+    if match.group("number"):
+        return "decimal-1", SECTION_RANK + 1, match.group("number")
+
+    label = match.group("paren")
+    if label.isdigit():
+        return "digit", None, f"({label})"
+    if label.isupper():
+        return "upper", None, f"({label})"
+    if set(label) <= ROMAN_CHARS:
+        if len(label) > 1:
+            return "roman", None, f"({label})"
+        # A single (i), (v), (c) ... is a letter when it continues an alphabetic run,
+        # and only starts or continues a roman list otherwise
+        kinds = {entry[0]: entry[2] for entry in stack}
+        previous_alpha = kinds.get("alpha")
+        if previous_alpha and ord(previous_alpha[1]) + 1 == ord(label):
+            return "alpha", None, f"({label})"
+        if label == "i" or "roman" in kinds:
+            return "roman", None, f"({label})"
+    return "alpha", None, f"({label})"
+
+
+def parse_sections(text: str, min_headings: int = 3, min_paragraph_length: int = 100) -> List[Section]:
+    """
+    Parse numbered headings into a flat, document-ordered section tree
+
+    Recognizes ARTICLE/Section headings, decimal numbering (1., 1.1, 1.1.1)
+    and parenthesized items ((a), (iv), (A), (1)). Each section records its
+    parent index, so the list doubles as a tree. Falls back to blank-line
+    paragraphs (longer than `min_paragraph_length` characters) when fewer
+    than `min_headings` headings are found.
+
+    Returns:
+        List of Section objects in document order
+    """
+    sections: List[Section] = []
+    # Stack entries: (kind, rank, label, section_index)
+    stack: List[tuple] = []
+
+    for match in HEADING_PATTERN.finditer(text):
+        kind, rank, label = _classify_heading(match, stack)
+
+        if rank is not None:
+            while stack and (stack[-1][1] is None or stack[-1][1] >= rank):
+                stack.pop()
+        elif any(entry[0] == kind for entry in stack):
+            while stack[-1][0] != kind:
+                stack.pop()
+            stack.pop()
+
+        parent = stack[-1][3] if stack else None
+        if sections:
+            sections[-1].end = match.start()
+        sections.append(Section(match.start(), len(text), match.end(),
+                                len(stack), kind, label, parent))
+        stack.append((kind, rank, label, len(sections) - 1))
+
+    if len(sections) < min_headings:
+        return _parse_paragraphs(text, min_paragraph_length)
+
+    _assign_subtree_ends(sections, len(text))
+    return sections
+
+
+def partition_sections(text: str, min_headings: int = 3) -> List[Section]:
+    """
+    Sections covering the whole text, for consumers that must not miss any of it
+
+    Like parse_sections, plus a "preamble" section for the text before the
+    first heading (parties, recitals, effective date), and the paragraph
+    fallback keeps short paragraphs.
+
+    Returns:
+        List of Section objects in document order
+    """
+    sections = parse_sections(text, min_headings, min_paragraph_length=0)
+    if not sections or sections[0].kind == "paragraph" or not text[:sections[0].start].strip():
+        return sections
+
+    for section in sections:
+        if section.parent is not None:
+            section.parent += 1
+    return [Section(0, sections[0].start, 0, 0, "preamble", "Preamble", None)] + sections
+
+
+def _parse_paragraphs(text: str, min_length: int = 100) -> List[Section]:
+    """Fallback: blank-line separated paragraphs as flat sections"""
+    sections = []
+    start = 0
+    for match in PARAGRAPH_BREAK.finditer(text):
+        _append_paragraph(sections, text, start, match.start(), min_length)
+        start = match.end()
+    _append_paragraph(sections, text, start, len(text), min_length)
+    return sections
+
+
+def _append_paragraph(sections: List[Section], text: str, start: int, end: int, min_length: int):
+    """Add a paragraph section if it is long enough"""
+    if end - start > min_length and len(text[start:end].strip()) > min_length:
+        sections.append(Section(start, end, start, 0, "paragraph",
+                                f"Paragraph {len(sections) + 1}", None))
+
+
+def _assign_subtree_ends(sections: List[Section], text_length: int):
+    """Set subtree_end to the start of the next section at the same or higher level"""
+    open_sections: List[Section] = []
+    for section in sections:
+        while open_sections and open_sections[-1].level >= section.level:
+            open_sections.pop().subtree_end = section.start
+        open_sections.append(section)
+    for section in open_sections:
+        section.subtree_end = text_length
@@ -0,0 +1,139 @@
+"""
+Stage timing spans and process-wide Prometheus-format metrics
+"""
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+# Seconds; covers a regex pass up to OCR of a long scan
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label value, rendered in Prometheus text format"""
+
+    def __init__(self, name: str, help_text: str, label: str = None, buckets: Tuple[float, ...] = DURATION_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self.buckets = buckets
+        self._series: Dict[Optional[str], List] = {}  # label value -> [bucket counts, sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, label_value: str = None):
+        with self._lock:
+            series = self._series.get(label_value)
+            if series is None:
+                series = self._series[label_value] = [[0] * len(self.buckets), 0.0, 0]
+            i = bisect_left(self.buckets, value)
+            if i < len(self.buckets):
+                series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {key: (list(counts), total, count) for key, (counts, total, count) in self._series.items()}
+        for label_value, (counts, total, count) in sorted(series.items(), key=lambda item: item[0] or ""):
+            labels = f'{self.label}="{label_value}"' if self.label else ""
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                lines.append(f'{self.name}_bucket{{{labels}{"," if labels else ""}le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{labels}{"," if labels else ""}le="+Inf"}} {count}')
+            suffix = f"{{{labels}}}" if labels else ""
+            lines.append(f"{self.name}_sum{suffix} {total:.6f}")
+            lines.append(f"{self.name}_count{suffix} {count}")
+        return lines
+
+
+STAGE_SECONDS = Histogram(
+    "legal_fly_stage_duration_seconds",
+    "Time spent in each pipeline stage, excluding nested stages",
+    label="stage"
+)
+ANALYSIS_SECONDS = Histogram(
+    "legal_fly_analysis_duration_seconds",
+    "End-to-end time of a contract analysis request"
+)
+
+_active_timer: ContextVar[Optional["StageTimer"]] = ContextVar("stage_timer", default=None)
+
+
+class StageTimer:
+    """
+    Per-request stage breakdown
+
+    Use as a context manager around a request; `timed` spans opened inside
+    it (including in threadpool calls, which copy the context) add their
+    time here. A nested stage's time is subtracted from its parent, so the
+    stages add up to the time spent inside spans.
+    """
+
+    def __init__(self):
+        self.stages: Dict[str, float] = defaultdict(float)
+        self.total: Optional[float] = None
+        self._open: List[List[float]] = []  # child seconds of each open span
+        self._started = None
+        self._token = None
+
+    def __enter__(self) -> "StageTimer":
+        self._started = time.perf_counter()
+        self._token = _active_timer.set(self)
+        return self
+
+    def __exit__(self, *exc):
+        self.total = time.perf_counter() - self._started
+        _active_timer.reset(self._token)
+        ANALYSIS_SECONDS.observe(self.total)
+        return False
+
+    def breakdown(self) -> Dict[str, float]:
+        """Seconds per stage, rounded to 0.1 ms"""
+        return {stage: round(seconds, 4) for stage, seconds in self.stages.items()}
+
+
+@contextmanager
+def timed(stage: str):
+    """
+    Time a pipeline stage
+
+    Always recorded in the process metrics; also added to the current
+    request's StageTimer when there is one.
+    """
+    timer = _active_timer.get()
+    frame = [0.0]
+    if timer is not None:
+        timer._open.append(frame)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        exclusive = elapsed
+        if timer is not None:
+            timer._open.pop()
+            exclusive = elapsed - frame[0]
+            if timer._open:
+                timer._open[-1][0] += elapsed
+            timer.stages[stage] += exclusive
+        STAGE_SECONDS.observe(exclusive, stage)
+
+
+def render_metrics(extra: Dict[str, Tuple[str, str, float]] = None) -> str:
+    """
+    Stage and analysis histograms in Prometheus text format (per process)
+
+    Args:
+        extra: Additional samples, {name: (type, help, value)} with type
+            "counter" or "gauge"
+    """
+    lines = STAGE_SECONDS.render() + ANALYSIS_SECONDS.render()
+    for name, (metric_type, help_text, value) in (extra or {}).items():
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {metric_type}", f"{name} {value}"]
+    return "\n".join(lines) + "\n"